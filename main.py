@@ -17,8 +17,9 @@ from secure_eo_pipeline.components.processing import ProcessingEngine  # To appl
 from secure_eo_pipeline.components.storage import ArchiveManager  # To encrypt and store products
 from secure_eo_pipeline.components.access_control import AccessController  # For authentication and authorization
 from secure_eo_pipeline.resilience.backup_system import ResilienceManager  # To back up and restore files
-from secure_eo_pipeline.resilience.backup_system import ResilienceManager  # To back up and restore files
+from secure_eo_pipeline.resilience import backup_system  # For integrity audit fingerprints
 from secure_eo_pipeline.utils import security  # For hashing in recovery logic
+from secure_eo_pipeline.utils import jsonio  # For directory bootstrap and metadata I/O
 from secure_eo_pipeline.components.ids import IntrusionDetectionSystem # For log analysis
 from secure_eo_pipeline.db import sqlite_adapter
 
@@ -40,8 +41,13 @@ class InteractiveSession:
         # --- SESSION STATE ---
         self.current_user = None   # Stores the username of the logged-in operator -> None represents no logged-in user
         self.current_role = None   # Stores the RBAC role (admin/analyst/user) -> None represents no active role
+        self.session_token = None   # Stores the signed session token issued at login -> None represents no session
         self.active_product = None   # Stores the ID of the product currently being processed -> None represents no current product
         
+        # --- DIRECTORY BOOTSTRAP ---
+        # Every zone is created once here; components then skip per-call existence checks
+        jsonio.ensure_dirs(config.directories)
+        
         # --- COMPONENT INSTANTIATION ---
         self.source = EOSimulator()  # Creates a simulator instance to generate raw data
         self.ingestion_manager = IngestionManager()  # Creates an ingestion manager to validate and fingerprint data
@@ -236,13 +242,15 @@ class InteractiveSession:
         # We use Console.input with password=True from Rich, or getpass
         password = console.input("[bold]Enter Password:[/bold] ", password=True)
         
-        # Call the Access Controller to verify credentials and retrieve role
-        role = self.ac.authenticate(user, password)
+        # Call the Access Controller to verify credentials and retrieve role + session token
+        session = self.ac.authenticate_session(user, password)
         
-        if role:  # Checks if authentication succeeded
+        if session:  # Checks if authentication succeeded
             # Update the session state upon success
+            role, token = session  # Unpacks the role and the signed session token
             self.current_user = user  # Stores the username as the active user
             self.current_role = role  # Stores the role as the active role
+            self.session_token = token  # Stores the token used for fast authorization checks
             console.print(f"[green]✅ Access Granted. Welcome, Operator {user}.[/green]")  # Prints an access granted message
         else:  # Else branch for failure
             # Report failure
@@ -265,7 +273,8 @@ class InteractiveSession:
             return False  # Returns False to block the action
             
         # Step 2: Query the Access Controller for granular permission check
-        if self.ac.authorize(self.current_user, action):  # Calls authorize to check permission for the action
+        # The signed session token avoids a user-directory lookup on every command.
+        if self.ac.authorize_token(self.session_token, action):  # Verifies the token and checks permission for the action
             # Permission granted
             return True
         else:
@@ -416,7 +425,7 @@ class InteractiveSession:
         # Step 2: Pipeline Order
         if not self.check_prereq("processed", "Archive"): return  # Returns early if processing is incomplete
         
-        console.print("[dim italic]ℹ️  Executing Fernet encryption and replicating to backup...[/dim italic]")  # Prints archiving explanation
+        console.print("[dim italic]ℹ️  Executing AES-256-GCM encryption and replicating to backup...[/dim italic]")  # Prints archiving explanation
         with console.status("[cyan]Vaulting Product...[/cyan]", spinner="dots"):  # Starts a Rich status spinner context
             time.sleep(1.5)  # Sleeps to simulate archiving time
             
@@ -603,18 +612,14 @@ class InteractiveSession:
 
         # Perform a subtle but detectable tampering: override qc_status and hash fields
         try:
-            import json
-
-            with open(meta_path, "r") as f:
-                meta = json.load(f)
+            meta = jsonio.load_file(meta_path)
 
             meta["qc_status"] = "FORCED_OK"
             meta["tampered_flag"] = True
             if "original_hash" in meta:
                 meta["original_hash"] = "0000TAMPERED0000"
 
-            with open(meta_path, "w") as f:
-                json.dump(meta, f, indent=4)
+            jsonio.dump_file(meta, meta_path)
 
             console.print("[red]✅ Metadata tampered.[/red] Run 'process' or 'archive' again to see integrity checks react.")
         except Exception as e:
@@ -736,8 +741,8 @@ class InteractiveSession:
         # Define a callback to fetch the "Known Good Hash" from the backup vault
         def get_expected_hash(p):  # Defines a nested function to retrieve the backup hash
             bk_path = os.path.join(config.BACKUP_DIR, f"{p}.enc")  # Builds the backup file path
-            # Calculate the hash of the backup (trusted copy)
-            return security.calculate_hash(bk_path)  # Returns the hash of the backup file
+            # Calculate the hash of the backup (trusted copy), with the configured audit algorithm
+            return backup_system.audit_hash(bk_path)  # Returns the hash of the backup file
 
         with console.status("[green]Healing System...[/green]", spinner="material"):  # Starts a Rich status spinner context
             time.sleep(2) # Simulate audit and data transfer time
@@ -771,7 +776,7 @@ class InteractiveSession:
             return
 
         with console.status("[bold red]ROTATING SYSTEM KEYS...[/bold red]", spinner="bouncingBall"):
-             success = security.rotate_keys(config.ARCHIVE_DIR, config.BACKUP_DIR)
+             success = self.backup.rotate_keys()  # Also refreshes the backup records
 
         if success:
              console.print("[green]✅ Key Rotation Complete.[/green] New key is active.")
@@ -846,6 +851,14 @@ class InteractiveSession:
             status = "[green]OK[/green]" if exists else "[yellow]MISSING[/yellow]"
             table.add_row(label, status, path)
 
+        # Hashing backend (integrity fingerprints for ingestion and audits)
+        accelerated = "sha_ni" in security.SHA256_BACKEND or "sha2" in security.SHA256_BACKEND
+        table.add_row(
+            "SHA-256",
+            "[green]ACCELERATED[/green]" if accelerated else "[yellow]SOFTWARE[/yellow]",
+            f"Backend: {security.SHA256_BACKEND}",
+        )
+
         # SQLite
         if getattr(config, "USE_SQLITE", False):
             try:
@@ -912,6 +925,7 @@ class InteractiveSession:
                     # Reset session variables
                     self.current_user = None  # Clears the current user
                     self.current_role = None  # Clears the current role
+                    self.session_token = None  # Discards the session token
                     console.print("Logged out successfully.")  # Prints a logout message
                     
                 elif cmd == "scan":  # Checks for the scan command
@@ -18,6 +18,12 @@ from secure_eo_pipeline.db import sqlite_adapter
 # get the update immediately without manual error.
 # =============================================================================
 
+import base64  # For transport-safe session tokens
+import hashlib  # For the HMAC digest algorithm
+import hmac  # For signing and verifying session tokens
+import secrets  # For the per-process token signing key
+import time  # For token expiry
+
 import bcrypt  # For password verification
 
 
@@ -33,6 +39,16 @@ class AccessController:
         self._failed_attempts = {}
         self._locked_until = {}
 
+        # Session token state.
+        # The signing key lives only in memory: restarting the process invalidates all sessions.
+        self._token_key = secrets.token_bytes(32)
+        # Bumped on every IAM change to a user, which revokes their outstanding tokens.
+        self._session_generation = {}
+        # Pre-computed role -> permission set index for O(1) token authorization.
+        self._permissions = {
+            name: frozenset(role_def.get("permissions", [])) for name, role_def in config.ROLES.items()
+        }
+
     def _is_secure_mode(self):
         return getattr(config, "MODE", "DEMO").upper() == "SECURE"
 
@@ -78,6 +94,45 @@ class AccessController:
         self._failed_attempts.pop(username, None)
         self._locked_until.pop(username, None)
 
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._token_key, payload, hashlib.sha256).digest()
+
+    def _invalidate_sessions(self, username):
+        self._session_generation[username] = self._session_generation.get(username, 0) + 1
+
+    def _issue_token(self, username, role):
+        """
+        Builds a signed token: base64(username|role|expiry|generation || HMAC-SHA256).
+        """
+        expiry = int(time.time()) + getattr(config, "SESSION_TTL_SECONDS", 900)
+        generation = self._session_generation.get(username, 0)
+        payload = f"{username}|{role}|{expiry}|{generation}".encode("utf-8")
+        return base64.urlsafe_b64encode(payload + self._sign(payload)).decode("ascii")
+
+    def _verify_token(self, token):
+        """
+        Returns (username, role) for a valid token, or None if it is forged, expired or revoked.
+        """
+        try:
+            raw = base64.urlsafe_b64decode(token.encode("ascii"))
+        except Exception:
+            return None
+
+        payload, mac = raw[:-32], raw[-32:]
+        # Constant-time comparison prevents timing attacks on the signature
+        if len(raw) <= 32 or not hmac.compare_digest(mac, self._sign(payload)):
+            return None
+
+        try:
+            username, role, expiry, generation = payload.decode("utf-8").rsplit("|", 3)
+            expiry, generation = int(expiry), int(generation)
+        except ValueError:
+            return None
+
+        if time.time() >= expiry or generation != self._session_generation.get(username, 0):
+            return None
+        return username, role
+
     def _validate_password_policy(self, password: str) -> bool:
         """
         Simple password policy used when creating users.
@@ -154,6 +209,51 @@ class AccessController:
 
 
 
+    def authenticate_session(self, username, password):
+        
+        """
+        Authenticates the user and issues a short-lived signed session token.
+        
+        RETURNS:
+            tuple: (role, token) on success, or None on failure.
+            
+        RATIONALE:
+        bcrypt is deliberately slow, so it runs once per login. Every later
+        permission check verifies the token HMAC instead (see authorize_token).
+        """
+        
+        role = self.authenticate(username, password)
+        if not role:
+            return None
+        return role, self._issue_token(username, role)
+
+
+
+    def authorize_token(self, token, action):
+        
+        """
+        Validates a session token and checks the requested permission.
+        
+        ARGUMENTS:
+            token (str): A token issued by authenticate_session().
+            action (str): The operation being requested.
+        """
+        
+        session = self._verify_token(token) if token else None
+        if session is None:
+            audit_log.warning(f"[ACCESS] DENIED: Invalid or expired session token for '{action}'.")
+            return False
+
+        username, role_name = session
+        if action in self._permissions.get(role_name, ()):
+            audit_log.info(f"[ACCESS] GRANTED: {username} ({role_name}) is authorized for '{action}'.")
+            return True
+
+        audit_log.warning(f"[ACCESS] DENIED: {username} ({role_name}) missing required permission: '{action}'.")
+        return False
+
+
+
     def authorize(self, username, action):
         
         """
@@ -251,6 +351,7 @@ class AccessController:
         else:
             config.USERS_DB[username] = {"role": role, "hash": password_hash}
 
+        self._invalidate_sessions(username)
         audit_log.info(f"[IAM] User '{username}' created/updated with role '{role}'.")
 
     def delete_user(self, username):
@@ -262,6 +363,7 @@ class AccessController:
         else:
             config.USERS_DB.pop(username, None)
 
+        self._invalidate_sessions(username)
         audit_log.warning(f"[IAM] User '{username}' deleted from directory.")
 
     def update_role(self, username, role):
@@ -274,6 +376,7 @@ class AccessController:
             if username in config.USERS_DB:
                 config.USERS_DB[username]["role"] = role
 
+        self._invalidate_sessions(username)
         audit_log.info(f"[IAM] Role for '{username}' updated to '{role}'.")
 
     def set_disabled(self, username, disabled=True):
@@ -288,5 +391,6 @@ class AccessController:
                     username
                 ].get("role", "user")
 
+        self._invalidate_sessions(username)
         state = "disabled" if disabled else "enabled"
         audit_log.warning(f"[IAM] User '{username}' has been {state}.")
@@ -1,9 +1,11 @@
+import io  # For building the cached .npy header in memory
 import os  # For filesystem operations
-import json  # To write metadata files
 import time  # For timestamps
 import numpy as np  # For synthetic image data
+from numpy.lib import format as npy_format  # For the .npy header layout
 
 from secure_eo_pipeline import config  # For directory paths
+from secure_eo_pipeline.utils import jsonio  # To write metadata files
 from secure_eo_pipeline.utils.logger import audit_log  # To record events
 
 # =============================================================================
@@ -21,6 +23,16 @@ from secure_eo_pipeline.utils.logger import audit_log  # To record events
 # =============================================================================
 
 
+# Fixed raster layout of every simulated product: 100x100 pixels, 3 spectral bands.
+PRODUCT_SHAPE = (100, 100, 3)
+PRODUCT_DTYPE = np.float32
+
+# Spacing of the timestamps within one generated batch. Metadata stores seconds
+# as a float64, which near the current epoch resolves ~0.24 us: a 1 ns step
+# would be rounded away and give every product of a batch the same time.
+BATCH_TIMESTAMP_STEP_NS = 1_000
+
+
 class EOSimulator:
     
     """
@@ -35,13 +47,44 @@ class EOSimulator:
         
         # Step 1: Ensure the "Landing Zone" (Ingest Directory) exists on the disk.
         # This is where the satellite "beams down" its initial files.
-        if not os.path.exists(config.INGEST_DIR):  # Checks if ingest directory exists
-            # If the directory is missing, create it automatically.
-            os.makedirs(config.INGEST_DIR)
+        # If the directory is missing, create it automatically (no separate exists() check).
+        os.makedirs(config.INGEST_DIR, exist_ok=True)
+
+        # Step 2: Pre-compute the .npy header once.
+        # Every product has the same shape and dtype, so the header bytes never change.
+        # RATIONALE: Writing becomes "header + raw bytes" with no per-call formatting.
+        header_buffer = io.BytesIO()
+        header = {"descr": npy_format.dtype_to_descr(np.dtype(PRODUCT_DTYPE)),
+                  "fortran_order": False, "shape": PRODUCT_SHAPE}
+        npy_format.write_array_header_1_0(header_buffer, header)
+        self._npy_header = header_buffer.getvalue()
+
+        # Step 3: Create a private random generator for this simulator.
+        # RATIONALE: The legacy global np.random state is shared (and locked) across
+        # threads; a per-instance Generator lets simulators run in parallel.
+        self._rng = np.random.default_rng()
+
+
+
+    def _write_npy(self, file_path, data):
+        
+        """
+        Writes `data` as a .npy file using the cached header.
+        
+        The file is written to a temporary path and atomically renamed so that
+        ingestion never observes a half-written product.
+        """
+        
+        tmp_path = file_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self._npy_header)
+            # tofile() streams the raw C-contiguous buffer without extra copies
+            data.tofile(f)
+        os.replace(tmp_path, file_path)
             
             
             
-    def generate_product(self, product_id, corrupted=False):
+    def generate_product(self, product_id, corrupted=False, timestamp_ns=None):
         
         """
         Creates a new synthetic product consisting of a binary data file and a metadata file.
@@ -50,6 +93,8 @@ class EOSimulator:
             product_id (str): A unique string to identify this specific image capture.
             corrupted (bool): A flag used for testing. If True, the data will contain 
                               invalid 'NaN' values to test Quality Control detection.
+            timestamp_ns (int): Optional acquisition time in nanoseconds since the epoch.
+                                Defaults to the current time.
         """
         
         # Step 1: Log the start of the generation process for auditing purposes
@@ -64,7 +109,7 @@ class EOSimulator:
         # Step 3: DATA SIMULATION (The Image)
         # We generate a 3D matrix (100x100 pixels, with 3 spectral bands/colors).
         # RATIONALE: This mimics the multi-spectral format used by missions like Sentinel-2.
-        data = np.random.rand(100, 100, 3).astype(np.float32)  # Creates a random float array
+        data = self._rng.random(PRODUCT_SHAPE, dtype=PRODUCT_DTYPE)  # Creates a random float array
         
         # Step 4: ERROR INJECTION (Simulation only)
         # If the 'corrupted' flag is set, we overwrite one pixel with 'NaN' (Not a Number).
@@ -84,25 +129,26 @@ class EOSimulator:
         # Step 6: BINARY STORAGE
         # Save the NumPy array to a binary file on the local disk.
         # .npy is an efficient format for storing large numerical datasets.
-        np.save(file_path, data)  # Saves the array to disk
+        self._write_npy(file_path, data)  # Saves the array to disk (standard .npy layout)
         
         # Step 7: METADATA GENERATION (The Digital Label)
         # Metadata is critical for security and provenance.
         # It answers: When was this taken? By what sensor? Where in orbit?
+        if timestamp_ns is None:  # Reads the clock only when the caller did not supply a time
+            timestamp_ns = time.time_ns()
         metadata = {  # Starts metadata dictionary
             "product_id": product_id,
-            "timestamp": time.time(), # Recording the exact moment of generation
+            "timestamp": timestamp_ns / 1e9, # Recording the exact moment of generation
             "sensor": "Simulated-HyperSpectral-1", # Identifying the "Source of Truth"
             "orbit": 1234, # Simulated orbit number
             # Scientific metric (Randomly generated for realism)
-            "cloud_cover_percentage": np.random.uniform(0, 100)
+            "cloud_cover_percentage": float(self._rng.uniform(0, 100))
         }
         
         # Step 8: METADATA STORAGE
-        # Serialize the metadata dictionary into a human-readable JSON file.
-        # indent=4 makes the file easier for human operators to inspect.
-        with open(meta_path, "w") as f:  # Opens metadata file for writing
-            json.dump(metadata, f, indent=4)  # Dumps metadata to JSON with indentation
+        # Serialize the metadata dictionary into a human-readable (indented) JSON file.
+        # Indentation makes the file easier for human operators to inspect.
+        jsonio.dump_file(metadata, meta_path)  # Dumps metadata to JSON with indentation
             
         # Step 9: COMPLETION LOGGING
         # Log that the data has successfully landed and is ready for the next stage (Ingestion).
@@ -110,3 +156,28 @@ class EOSimulator:
         
         # Return the path to the binary file to the caller
         return file_path  # Returns the data file path
+
+
+
+    def generate_products_batch(self, product_ids, corrupted=False):
+        
+        """
+        Generates several products in one call.
+        
+        ARGUMENTS:
+            product_ids (list): The identifiers of the products to create.
+            corrupted (bool): Passed through to generate_product().
+            
+        RETURNS:
+            list: The data file paths (None for products that failed).
+            
+        The clock is read once; each product receives a distinct timestamp,
+        BATCH_TIMESTAMP_STEP_NS (1 microsecond) after the previous one, to
+        preserve acquisition order.
+        """
+        
+        base_ns = time.time_ns()
+        return [
+            self.generate_product(pid, corrupted=corrupted, timestamp_ns=base_ns + i * BATCH_TIMESTAMP_STEP_NS)
+            for i, pid in enumerate(product_ids)
+        ]
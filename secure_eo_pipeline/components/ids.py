@@ -1,8 +1,135 @@
 import os
 from typing import List, Dict
 
+import numpy as np
+
 from secure_eo_pipeline import config
 from secure_eo_pipeline.db import sqlite_adapter
+from secure_eo_pipeline.utils.logger import flush_audit_log
+
+# Per-line authentication signature IDs used by the vectorized brute-force rule.
+SIG_OTHER = 0
+SIG_FAILURE = 1
+SIG_SUCCESS = 2
+
+# Number of consecutive failures that constitutes a brute-force incident.
+BRUTE_FORCE_THRESHOLD = 3
+
+# Fixed substrings the rule engine looks for. The column order of the match
+# matrix produced by _match_signatures() follows this tuple.
+SIGNATURE_PATTERNS = (
+    "hacker",
+    "Access Denied",
+    "FAILURE",
+    "SUCCESS",
+    "Attack successful",
+    "INTEGRITY FAILURE",
+    "Unauthorized",
+    "lacks",
+    "[BACKUP] FAILED",
+    "Backup also missing",
+)
+(
+    P_HACKER,
+    P_ACCESS_DENIED,
+    P_FAILURE,
+    P_SUCCESS,
+    P_ATTACK_SUCCESSFUL,
+    P_INTEGRITY_FAILURE,
+    P_UNAUTHORIZED,
+    P_LACKS,
+    P_BACKUP_FAILED,
+    P_BACKUP_MISSING,
+) = range(len(SIGNATURE_PATTERNS))
+
+# Logs shorter than this are scanned in Python; the Hyperscan database compile
+# and import cost only pays off on large logs.
+HYPERSCAN_MIN_LINES = 50_000
+
+
+def _match_signatures_python(lines: List[str]) -> np.ndarray:
+    """
+    Builds the (lines x patterns) boolean match matrix with substring checks.
+    """
+    matches = np.zeros((len(lines), len(SIGNATURE_PATTERNS)), dtype=bool)
+    for col, pattern in enumerate(SIGNATURE_PATTERNS):
+        matches[:, col] = np.fromiter((pattern in line for line in lines), dtype=bool, count=len(lines))
+    return matches
+
+
+def _match_signatures_hyperscan(lines: List[str]) -> np.ndarray:
+    """
+    Builds the match matrix with a single Hyperscan multi-pattern pass.
+
+    All patterns are compiled into one database and the whole log is scanned
+    once; match end offsets are mapped back to line numbers.
+    """
+    import re
+
+    import hyperscan
+
+    encoded = [line.encode("utf-8") for line in lines]
+    data = b"\n".join(encoded)
+    # Byte offset at which each line starts in `data`.
+    lengths = np.fromiter((len(e) + 1 for e in encoded), dtype=np.int64, count=len(encoded))
+    line_starts = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+
+    db = hyperscan.Database()
+    db.compile(
+        expressions=[re.escape(p).encode("utf-8") for p in SIGNATURE_PATTERNS],
+        ids=list(range(len(SIGNATURE_PATTERNS))),
+        flags=[0] * len(SIGNATURE_PATTERNS),
+    )
+
+    hit_ids: List[int] = []
+    hit_ends: List[int] = []
+
+    def on_match(pattern_id, start, end, flags, context):
+        hit_ids.append(pattern_id)
+        hit_ends.append(end)
+
+    db.scan(data, match_event_handler=on_match)
+
+    matches = np.zeros((len(lines), len(SIGNATURE_PATTERNS)), dtype=bool)
+    if hit_ids:
+        rows = np.searchsorted(line_starts, np.asarray(hit_ends) - 1, side="right") - 1
+        matches[rows, np.asarray(hit_ids)] = True
+    return matches
+
+
+def _match_signatures(lines: List[str]) -> np.ndarray:
+    """
+    Returns the (lines x patterns) match matrix, using Hyperscan for large logs when installed.
+    """
+    if len(lines) >= HYPERSCAN_MIN_LINES:
+        try:
+            return _match_signatures_hyperscan(lines)
+        except ImportError:
+            pass
+    return _match_signatures_python(lines)
+
+
+def brute_force_positions(sig_ids: np.ndarray, threshold: int = BRUTE_FORCE_THRESHOLD) -> np.ndarray:
+    """
+    Returns the line indices at which a brute-force incident is raised.
+
+    Semantics match the original sequential counter: failures accumulate,
+    a SUCCESS line resets the streak, unrelated lines are ignored, and the
+    streak restarts after every `threshold` failures.
+    """
+    # Drop lines that do not participate in the authentication streak.
+    auth_idx = np.flatnonzero(sig_ids != SIG_OTHER)
+    if auth_idx.size == 0:
+        return auth_idx
+
+    fails = sig_ids[auth_idx] == SIG_FAILURE
+    # Running count of failures, and its value at the most recent SUCCESS.
+    fail_count = np.cumsum(fails)
+    last_reset = np.maximum.accumulate(np.where(fails, 0, fail_count))
+    streak = fail_count - last_reset
+
+    return auth_idx[fails & (streak % threshold == 0)]
+
 
 class IntrusionDetectionSystem:
     """
@@ -21,6 +148,7 @@ class IntrusionDetectionSystem:
             List[Dict]: A list of detected incidents, each with 'severity', 'type', and 'details'.
         """
         incidents: List[Dict[str, str]] = []
+        flush_audit_log()  # Events still queued for the log writer count too
 
         # If a custom log_path was provided and the file exists, always honor it
         # and use file-based analysis. This is important for tests and for
@@ -106,14 +234,31 @@ class IntrusionDetectionSystem:
 
     def _run_signature_rules(self, lines) -> List[Dict[str, str]]:
         incidents: List[Dict[str, str]] = []
-        consecutive_failures = 0
+        lines = list(lines)
+
+        # One multi-pattern scan over the whole window; every rule below is a
+        # boolean combination of the match matrix columns.
+        m = _match_signatures(lines)
 
-        failed_logins = 0
-        critical_events = 0
+        failure = m[:, P_ACCESS_DENIED] | m[:, P_FAILURE]
+        sig_ids = np.where(failure, SIG_FAILURE, np.where(m[:, P_SUCCESS], SIG_SUCCESS, SIG_OTHER)).astype(np.int8)
+
+        brute_force = np.zeros(len(lines), dtype=bool)
+        brute_force[brute_force_positions(sig_ids)] = True
+        tampering = m[:, P_ATTACK_SUCCESSFUL] | m[:, P_INTEGRITY_FAILURE]
+        escalation = m[:, P_UNAUTHORIZED] & m[:, P_LACKS]
+        backup = m[:, P_BACKUP_FAILED] | m[:, P_BACKUP_MISSING]
+
+        failed_logins = int(np.count_nonzero(failure))
+        critical_events = int(np.count_nonzero(tampering) + np.count_nonzero(backup))
+
+        # Only lines that triggered at least one rule are visited in Python.
+        flagged = m[:, P_HACKER] | brute_force | tampering | escalation | backup
+        for i in np.flatnonzero(flagged).tolist():
+            line = lines[i]
 
-        for line in lines:
             # Signature 1: Known Malicious Actor
-            if "hacker" in line:
+            if m[i, P_HACKER]:
                 incidents.append(
                     {
                         "severity": "HIGH",
@@ -122,15 +267,8 @@ class IntrusionDetectionSystem:
                     }
                 )
 
-            # Signature 2: Brute Force Detection (Simple Pattern)
-            if "Access Denied" in line or "FAILURE" in line:
-                consecutive_failures += 1
-                failed_logins += 1
-            else:
-                if "SUCCESS" in line:
-                    consecutive_failures = 0
-
-            if consecutive_failures >= 3:
+            # Signature 2: Brute Force Detection
+            if brute_force[i]:
                 incidents.append(
                     {
                         "severity": "CRITICAL",
@@ -138,10 +276,9 @@ class IntrusionDetectionSystem:
                         "details": "Multiple consecutive authentication failures detected.",
                     }
                 )
-                consecutive_failures = 0
 
             # Signature 3: Data Tampering
-            if "Attack successful" in line or "INTEGRITY FAILURE" in line:
+            if tampering[i]:
                 incidents.append(
                     {
                         "severity": "CRITICAL",
@@ -149,10 +286,9 @@ class IntrusionDetectionSystem:
                         "details": f"CONFIRMED: Storage integrity issue. Context: {line}",
                     }
                 )
-                critical_events += 1
 
             # Signature 4: Unauthorized Resource Access
-            if "Unauthorized" in line and "lacks" in line:
+            if escalation[i]:
                 incidents.append(
                     {
                         "severity": "MEDIUM",
@@ -162,7 +298,7 @@ class IntrusionDetectionSystem:
                 )
 
             # Signature 5: Backup sabotage
-            if "[BACKUP] FAILED" in line or "Backup also missing" in line:
+            if backup[i]:
                 incidents.append(
                     {
                         "severity": "HIGH",
@@ -170,7 +306,6 @@ class IntrusionDetectionSystem:
                         "details": f"Backup or redundancy failure detected: {line}",
                     }
                 )
-                critical_events += 1
 
         # Optional: basic ML-style scoring over the whole window of events.
         if getattr(config, "USE_ML", False):
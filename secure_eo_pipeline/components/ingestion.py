@@ -1,10 +1,11 @@
 import os  # For filesystem operations
-import json  # For metadata parsing
-import shutil  # For file copying
-from typing import Optional
+import json  # For the JSON error type
+from typing import Dict, List, Optional, Tuple
 
 from secure_eo_pipeline import config  # For directory paths
 from secure_eo_pipeline.utils import security  # For hashing
+from secure_eo_pipeline.utils import jsonio  # For fast metadata I/O
+from secure_eo_pipeline.utils.io_uring_backend import BatchIO  # For batched metadata reads
 from secure_eo_pipeline.utils.logger import audit_log  # For event logging
 
 # =============================================================================
@@ -22,19 +23,116 @@ from secure_eo_pipeline.utils.logger import audit_log  # For event logging
 # =============================================================================
 
 
+# Metadata records read per io_uring submission by ingest_products()
+INGEST_READ_GROUP = 32
+
+# The "Minimum Viable Metadata" (MVM) every product must declare.
+# RATIONALE: If these keys are missing, our processing engine won't know what to do.
+REQUIRED_METADATA_KEYS = frozenset(("product_id", "timestamp", "sensor"))
+
+
 class IngestionManager:
     
     """
     Handles the secure intake and validation of newly arrived EO products.
     """
 
-    def ingest_product(self, product_id: str) -> Optional[str]:
+    # The SHA-256 backend is fixed at import time, so it is announced only once
+    _backend_logged = False
+
+    def __init__(self):
+        if not IngestionManager._backend_logged:
+            audit_log.info(f"[INGEST] Integrity fingerprints use the SHA-256 backend: {security.SHA256_BACKEND}")
+            IngestionManager._backend_logged = True
+
+    def _scan_landing_zone(self) -> Dict[str, Tuple[bool, bool]]:
+        
+        """
+        Lists the Landing Zone once and reports which product files have arrived.
+        
+        RETURNS:
+            dict: {product_id: (has_npy, has_json)}
+            
+        RATIONALE:
+        One scandir() pass replaces two stat() calls per product. The directory
+        entries already carry the file type, so nothing is re-statted.
+        """
+        
+        scan = {}
+        try:
+            with os.scandir(config.INGEST_DIR) as entries:
+                for entry in entries:
+                    product_id, dot, ext = entry.name.rpartition(".")
+                    if not dot or ext not in ("npy", "json") or not entry.is_file():
+                        continue
+                    has_npy, has_json = scan.get(product_id, (False, False))
+                    scan[product_id] = (has_npy or ext == "npy", has_json or ext == "json")
+        except FileNotFoundError:
+            pass  # No Landing Zone yet: nothing has arrived
+        return scan
+
+    def ingest_products(self, product_ids: List[str]) -> List[Optional[str]]:
+        
+        """
+        Ingests a batch of products, listing the Landing Zone only once.
+        
+        RETURNS:
+            list: ingest_product() results, in the same order as `product_ids`.
+            
+        RATIONALE:
+        With io_uring, the metadata records of every complete product are read
+        in one submission per INGEST_READ_GROUP products instead of one
+        open/read/close chain each. Without it (no 'liburing' binding, old
+        kernel) each product simply reads its own record.
+        """
+        
+        landing_scan = self._scan_landing_zone()
+        prefetched = self._read_metadata_batch(
+            [pid for pid in product_ids if landing_scan.get(pid) == (True, True)]
+        )
+        return [
+            self.ingest_product(product_id, landing_scan, prefetched.get(product_id))
+            for product_id in product_ids
+        ]
+
+    def _read_metadata_batch(self, product_ids: List[str]) -> Dict[str, bytes]:
+        
+        """
+        Reads the Landing Zone metadata of the given products through io_uring.
+        
+        RETURNS:
+            dict: {product_id: raw JSON bytes}. Empty without io_uring; a group
+            with a vanished file is left out, so its products read their own.
+        """
+        
+        raw = {}
+        engine = BatchIO(queue_depth=INGEST_READ_GROUP)
+        try:
+            if engine.backend != "io_uring":
+                return raw
+            for start in range(0, len(product_ids), INGEST_READ_GROUP):
+                group = product_ids[start:start + INGEST_READ_GROUP]
+                paths = [os.path.join(config.INGEST_DIR, f"{pid}.json") for pid in group]
+                try:
+                    raw.update(zip(group, engine.read_files(paths)))
+                except FileNotFoundError:
+                    continue  # ingest_product() reports the missing file
+        finally:
+            engine.close()
+        return raw
+
+    def ingest_product(self, product_id: str, landing_scan: Optional[Dict[str, Tuple[bool, bool]]] = None,
+                       raw_meta: Optional[bytes] = None) -> Optional[str]:
         
         """
         Validates, fingerprints, and registers a product for internal use.
         
         ARGUMENTS:
             product_id (str): The unique identifier of the product to ingest.
+            landing_scan (dict, optional): A pre-built _scan_landing_zone() result,
+                shared across a batch. When omitted, the files are checked directly.
+            raw_meta (bytes, optional): The metadata file contents, already read
+                by a batch. When omitted, the file is read here.
             
         RETURNS:
             str: The new path to the ingested file, or None if validation fails.
@@ -51,7 +149,11 @@ class IngestionManager:
         # PHASE 1: EXISTENCE VALIDATION
         # ---------------------------------------------------------------------
         # Check: Did both the binary data AND the metadata file arrive?
-        if not os.path.exists(source_file) or not os.path.exists(source_meta):  # Checks for both data and metadata files
+        if landing_scan is not None:
+            arrived = landing_scan.get(product_id, (False, False)) == (True, True)  # Uses the batch listing
+        else:
+            arrived = os.path.exists(source_file) and os.path.exists(source_meta)  # Checks for both data and metadata files
+        if not arrived:
             # Log a critical failure if part of the product is missing
             audit_log.error(f"[INGEST] FAILED: Incomplete product. Missing files for {product_id}.")  # Logs missing file error
             return None  # Returns None to stop ingestion
@@ -62,17 +164,19 @@ class IngestionManager:
         # We must ensure the metadata isn't "poisoned" or malformed.
         try:  # Starts a try block for JSON parsing
             # Step 1: Open and parse the JSON metadata
-            with open(source_meta, "r") as f:  # Opens metadata file
-                meta = json.load(f)  # Parses JSON into `meta`
+            if raw_meta is not None:
+                meta = jsonio.loads(raw_meta)  # Parses the batch-read JSON into `meta`
+            else:
+                meta = jsonio.load_file(source_meta)  # Parses JSON into `meta`
                 
-            # Step 2: Define the "Minimum Viable Metadata" (MVM)
-            # RATIONALE: If these keys are missing, our processing engine won't know what to do.
-            required_keys = ["product_id", "timestamp", "sensor"]  # Defines `required_keys` list
-            
-            # Step 3: Check if all mandatory keys exist in the provided file
-            if not all(key in meta for key in required_keys):  # Verifies all required keys exist
+            # Step 2: Check the record against the "Minimum Viable Metadata" (MVM)
+            # in one pass (the key set is built once, at import)
+            if not isinstance(meta, dict):
+                raise ValueError("Metadata must be a JSON object.")
+            missing = REQUIRED_METADATA_KEYS.difference(meta)  # Hash lookups, no lists rebuilt
+            if missing:
                 # If any are missing, the file is invalid.
-                raise ValueError(f"Missing mandatory fields: {set(required_keys) - set(meta.keys())}")  # Raises a ValueError if missing fields
+                raise ValueError(f"Missing mandatory fields: {set(missing)}")  # Raises a ValueError if missing fields
                 
         except (json.JSONDecodeError, ValueError) as e:  # Starts exception handling
             # Catch bad formatting or missing fields and log the specific reason
@@ -81,43 +185,41 @@ class IngestionManager:
             return None
 
         # ---------------------------------------------------------------------
-        # PHASE 3: INTEGRITY BASELINING (Digital Fingerprinting)
+        # PHASE 3: INTEGRITY BASELINING (Digital Fingerprinting) & SECURE HANDOVER
         # ---------------------------------------------------------------------
         # This is the most critical step for security.
         # We calculate the SHA-256 hash of the binary data at the moment of arrival.
         # RATIONALE: This hash becomes the "Legal Signature" of the file.
-        file_hash = security.calculate_hash(source_file)  # Calculates SHA-256 hash of the data file
-        
-        # We embed this hash INSIDE the metadata.
-        # This "binds" the data file to its metadata record.
-        meta["original_hash"] = file_hash  # Stores the hash in metadata
-        # Update the status to reflect that it has been checked
-        meta["status"] = "INGESTED"  # Sets status to INGESTED
-        
-        # ---------------------------------------------------------------------
-        # PHASE 4: SECURE HANDOVER (Isolation)
-        # ---------------------------------------------------------------------
         # Once validated, we move the data to a "Trusted" processing zone.
         # RATIONALE: We want to empty the Landing Zone quickly to reduce attack surface.
         
-        # Step 1: Ensure the Processing Staging directory exists
-        if not os.path.exists(config.PROCESSING_DIR):  # Creates processing directory if missing
-            os.makedirs(config.PROCESSING_DIR)
+        # Step 1: Ensure the Processing Staging directory exists (checked once per process)
+        jsonio.ensure_dir(config.PROCESSING_DIR)  # Creates processing directory if missing
             
         # Step 2: Define new destination paths inside the secure boundary
         dest_file = os.path.join(config.PROCESSING_DIR, f"{product_id}.npy")  # Builds destination data path
         dest_meta = os.path.join(config.PROCESSING_DIR, f"{product_id}.json")  # Builds destination metadata path
         
-        # Step 3: Physically move the data
-        shutil.copy(source_file, dest_file)  # Copies data file to processing zone
+        # Step 3: Physically move the data and fingerprint it in the same pass.
+        # RATIONALE: Each chunk is hashed on its way to the staging zone, so the
+        # Landing Zone file is read once instead of once for hashing and once for copying.
+        # A cheap CRC is computed alongside, so later stages can reject a modified
+        # file quickly before re-verifying the SHA-256 signature.
+        file_hash, file_checksum = security.copy_and_fingerprint(source_file, dest_file)  # Copies data file and hashes it
+        
+        # We embed this hash INSIDE the metadata.
+        # This "binds" the data file to its metadata record.
+        meta["original_hash"] = file_hash  # Stores the hash in metadata
+        meta["original_checksum"] = file_checksum  # Stores the fast pre-check checksum
+        # Update the status to reflect that it has been checked
+        meta["status"] = "INGESTED"  # Sets status to INGESTED
         
         # Step 4: Save the UPDATED metadata (now containing the Source Hash)
-        with open(dest_meta, "w") as f:  # Opens destination metadata file
-            # Dump the dictionary back to JSON with clean indentation
-            json.dump(meta, f, indent=4)  # Dumps updated metadata to JSON
+        # Dump the dictionary back to JSON with clean indentation
+        jsonio.dump_file(meta, dest_meta)  # Dumps updated metadata to JSON
             
         # Step 5: Finalize the log for the audit trail
-        audit_log.info(f"[INGEST] SUCCESS: Product {product_id} is verified and staged. Initial Hash: {file_hash}")  # Logs ingestion success and hash
+        audit_log.info(f"[INGEST] SUCCESS: Product {product_id} is verified and staged. Initial Hash: {file_hash} (SHA-256 backend: {security.SHA256_BACKEND})")  # Logs ingestion success and hash
         
         # Return the new path so the pipeline can continue to 'Processing'
         return dest_file
@@ -1,10 +1,17 @@
+import io  # For in-memory .npy encoding
 import os  # For filesystem operations
-import json  # For metadata parsing
+import threading  # For per-thread I/O engines
+from concurrent.futures import ThreadPoolExecutor  # For batch processing
+from typing import List, Optional
 import numpy as np  # For data processing
+from numpy.lib import format as npy_format  # For parsing .npy headers
 
 from secure_eo_pipeline import config  # For paths
 from secure_eo_pipeline.utils import security  # For hashing
+from secure_eo_pipeline.utils import qc_kernels  # For fused QC and calibration
+from secure_eo_pipeline.utils import jsonio  # For fast metadata I/O
 from secure_eo_pipeline.utils.logger import audit_log  # For event logging
+from secure_eo_pipeline.utils.io_uring_backend import AlignedBuffer, BatchIO  # For batched file I/O
 from secure_eo_pipeline.ml import features as ml_features
 from secure_eo_pipeline.ml import models as ml_models
 
@@ -24,12 +31,94 @@ from secure_eo_pipeline.ml import models as ml_models
 # We check for sensor malfunctions (NaN values) to ensure data 'Cleanliness'.
 # =============================================================================
 
+def _decode_npy(raw):
+    
+    """
+    Parses a .npy file already held in memory and returns a read-only array view over it.
+    Object arrays are refused, matching np.load(allow_pickle=False).
+    """
+    
+    stream = io.BytesIO(raw)
+    version = npy_format.read_magic(stream)
+    if version == (1, 0):
+        shape, fortran_order, dtype = npy_format.read_array_header_1_0(stream)
+    else:
+        shape, fortran_order, dtype = npy_format.read_array_header_2_0(stream)
+    if dtype.hasobject:
+        raise ValueError("Object arrays are not allowed in EO products.")
+    count = int(np.prod(shape, dtype=np.int64))
+    data = np.frombuffer(raw, dtype=dtype, count=count, offset=stream.tell())
+    return data.reshape(shape, order="F" if fortran_order else "C")
+
+
+def _allocate_npy(shape, dtype, fortran_order):
+    
+    """
+    Lays out a complete .npy file (header + payload) in one page-aligned buffer.
+    
+    RETURNS:
+        (AlignedBuffer, np.ndarray): the file buffer and a writable array view
+        over its payload region, so results can be computed straight into it.
+    """
+    
+    header = io.BytesIO()
+    npy_format.write_array_header_1_0(header, {
+        "descr": npy_format.dtype_to_descr(dtype),
+        "fortran_order": fortran_order,
+        "shape": shape,
+    })
+    offset = header.tell()  # NumPy pads the header so the payload stays aligned
+    count = int(np.prod(shape, dtype=np.int64))
+    
+    buffer = AlignedBuffer(offset + count * dtype.itemsize)
+    buffer.raw[:offset] = header.getvalue()
+    array = np.frombuffer(buffer.raw, dtype=dtype, count=count, offset=offset)
+    return buffer, array.reshape(shape, order="F" if fortran_order else "C")
+
+
 class ProcessingEngine:
     
     """
     Handles the scientific transformation and quality assurance of EO data.
     """
 
+    def __init__(self):
+        # Batched I/O engine (io_uring when available, POSIX otherwise).
+        # Both product files are read in one submission and written in another.
+        # An io_uring ring must not be shared between threads, so each worker
+        # thread of process_products() gets its own engine.
+        self._local = threading.local()
+
+    @property
+    def _io(self) -> BatchIO:
+        engine = getattr(self._local, "io", None)
+        if engine is None:
+            engine = self._local.io = BatchIO()
+        return engine
+
+    def process_products(self, product_ids: List[str], max_workers: Optional[int] = None) -> List[Optional[str]]:
+        
+        """
+        Processes a batch of products concurrently.
+        
+        ARGUMENTS:
+            product_ids (list): The IDs of the products currently in staging.
+            max_workers (int): Worker threads (default: 2 x CPU count).
+            
+        RETURNS:
+            list: process_product() results, in the same order as `product_ids`.
+            
+        RATIONALE:
+        Products are independent, and the heavy steps (file I/O, SHA-256 over
+        large buffers, the NumPy QC kernels) release the GIL, so threads give
+        real parallelism while sharing the page cache and the logger.
+        """
+        
+        if max_workers is None:
+            max_workers = (os.cpu_count() or 1) * 2
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.process_product, product_ids))
+
     def process_product(self, product_id):
         
         """
@@ -51,17 +140,23 @@ class ProcessingEngine:
         # ---------------------------------------------------------------------
         # Before we touch the data, we must prove it is the SAME data that was ingested.
         try:  # Starts try block for integrity
-            # Step 1: Read the metadata to find the "Expected Hash"
-            with open(input_meta, "r") as f:  # Opens metadata file
-                meta = json.load(f)  # Loads metadata JSON
+            # Step 1: Read the metadata and the data file in a single batched submission
+            meta_bytes, raw = self._io.read_files([input_meta, input_file])  # Reads both files
+            meta = jsonio.loads(meta_bytes)  # Parses metadata JSON
             
             # Step 2: Retrieve the hash recorded by the Ingestion component
             expected_hash = meta.get("original_hash")  # Reads `original_hash` from metadata
             
-            # Step 3: Calculate the ACTUAL hash of the file right now
-            actual_hash = security.calculate_hash(input_file)  # Calculates current hash of data file
+            # Step 3: Fast pre-check. The CRC is 10-30x cheaper than SHA-256, so a
+            # modified file is rejected without paying for the full hash.
+            if security.checksum_matches(raw, meta.get("original_checksum")) is False:
+                audit_log.error(f"[PROCESS] SECURITY ALERT: Input checksum mismatch for {product_id}!")  # Logs security alert if mismatch
+                return None  # Returns None to stop processing
+            
+            # Step 4: Calculate the ACTUAL hash of the bytes we just read (defense in depth)
+            actual_hash = security.calculate_hash_bytes(raw)  # Calculates current hash of data file
             
-            # Step 4: Compare. If they don't match, someone edited the file illegally!
+            # Step 5: Compare. If they don't match, someone edited the file illegally!
             if actual_hash != expected_hash:  # Compares current hash to expected hash
                 audit_log.error(f"[PROCESS] SECURITY ALERT: Input integrity mismatch for {product_id}!")  # Logs security alert if mismatch
                 # STOP: Do not process tampered data.
@@ -72,45 +167,44 @@ class ProcessingEngine:
             return None  # Returns None to stop processing
 
         # ---------------------------------------------------------------------
-        # PHASE 2: DATA LOADING & QUALITY CONTROL (QC)
+        # PHASE 2: DATA LOADING, QUALITY CONTROL (QC) & CALIBRATION
         # ---------------------------------------------------------------------
         try:  # Starts try block for data load
-            # Step 1: Load the binary scientific data into memory (as a NumPy array)
-            data = np.load(input_file)  # Loads NumPy array
+            # Step 1: Decode the binary scientific data already in memory (as a NumPy array)
+            data = _decode_npy(raw)  # Views the bytes as a NumPy array
+            
+            # Step 2: Lay out the output .npy file in memory, keeping the input's layout.
+            # RATIONALE: The calibrated values are written straight into the file
+            # buffer, so no intermediate array or serialization copy is made.
+            fortran_order = bool(data.flags.f_contiguous and not data.flags.c_contiguous)
+            npy_buffer, out = _allocate_npy(data.shape, qc_kernels.calibrated_dtype(data.dtype), fortran_order)
             
-            # Step 2: Perform the "Cleanliness" Check (Quality Control)
+            # Step 3: Perform the "Cleanliness" Check and the Radiometric Calibration together.
             # Sensors sometimes fail and produce 'Not a Number' (NaN) values.
             # RATIONALE: We don't want to waste storage space on garbage data.
-            if np.isnan(data).any():  # Checks for NaN values
-                # If even one pixel is NaN, we flag it as a Quality Failure.
-                audit_log.warning(f"[QC] REJECTED: Sensor corruption (NaN) detected in product {product_id}.")  # Logs a QC warning if NaN present
-                # Fail the processing step.
-                return None
+            # The fused kernel scans for NaN (stopping at the first one) and then
+            # scales + clamps in a single pass, instead of 3-4 separate array sweeps.
+            processed_data = qc_kernels.calibrate(data, out=out)  # Returns None if any NaN is present
                 
         except Exception as e:
             # Handle file read errors or memory issues
             audit_log.error(f"[PROCESS] FAILED: Data load error for {product_id}. Error: {e}")  # Logs data load error
             return None
 
+        if processed_data is None:
+            # If even one pixel is NaN, we flag it as a Quality Failure.
+            audit_log.warning(f"[QC] REJECTED: Sensor corruption (NaN) detected in product {product_id}.")  # Logs a QC warning if NaN present
+            # Fail the processing step.
+            return None
+
         # ---------------------------------------------------------------------
         # PHASE 3: SCIENTIFIC TRANSFORMATION
         # ---------------------------------------------------------------------
-        # Simulation: Radiometric Calibration.
-        # We normalize raw sensor values into a 0.0 to 1.0 reflectance range.
-        # If the data is already in [0, 1], we keep it as-is.
-        if data.dtype.kind in ("i", "u"):  # Checks whether data is integer type
-            # Integer data (0-255) is scaled to floating reflectance
-            processed_data = data.astype(np.float32) / 255.0  # Converts integer data to float and scales
-        else:
-            # Float data: only scale if values exceed the expected reflectance range
-            max_val = float(np.nanmax(data))  # Computes maximum value ignoring NaN
-            if max_val > 1.0:  # Checks if data exceeds expected range
-                processed_data = data / 255.0  # Scales down values if needed
-            else:  
-                processed_data = data  # Uses data directly
-        
-        # Clamp the values to a valid range to avoid negative or >1 artifacts
-        processed_data = np.clip(processed_data, 0.0, 1.0)  # Clamps values to [0, 1]
+        # Simulation: Radiometric Calibration (performed by qc_kernels.calibrate above).
+        # We normalize raw sensor values into a 0.0 to 1.0 reflectance range:
+        # - Integer data (0-255) is scaled to floating reflectance.
+        # - Float data is only scaled if values exceed the expected reflectance range.
+        # - Values are clamped to [0, 1] to avoid negative or >1 artifacts.
         
         # Optional: ML-based anomaly/quality scoring on the processed data
         if getattr(config, "USE_ML", False):
@@ -127,9 +221,6 @@ class ProcessingEngine:
             except Exception as e:
                 audit_log.warning(f"[ML] EO anomaly scoring failed for {product_id}: {e}")
 
-        # Step 1: Overwrite the binary file in the staging area with the NEW processed version.
-        np.save(input_file, processed_data)  # Saves processed data to the same file
-        
         # ---------------------------------------------------------------------
         # PHASE 4: PROVENANCE TRACKING (Updating the Record)
         # ---------------------------------------------------------------------
@@ -143,13 +234,31 @@ class ProcessingEngine:
         # Step 2: CALCULATE A NEW HASH.
         # RATIONALE: The old hash is no longer valid because the content is different.
         # We need a new "Digital Signature" for the Level-1 product.
-        new_hash = security.calculate_hash(input_file)  # Calculates new hash for processed data
+        # Hashing the file buffer gives the same digest as the file, without re-reading it.
+        new_hash = security.calculate_hash_bytes(npy_buffer.view)  # Calculates new hash for processed data
         # We store this as the "Processed Hash" to maintain the Chain of Custody.
         meta["processed_hash"] = new_hash  # Stores processed hash in metadata
         
-        # Step 3: Save the updated metadata back to disk
-        with open(input_meta, "w") as f:  # Writes updated metadata to JSON
-            json.dump(meta, f, indent=4)
+        # Step 3: Write the new data file and the updated metadata in one batched submission
+        # The data file bypasses the page cache (O_DIRECT): it was hashed from memory and is
+        # not read again until archiving, so caching it would only evict hotter pages.
+        # Both files are written next to the originals and renamed over them, so a
+        # crash never leaves a half-written Level-1 product or record behind. Both
+        # are fdatasync'ed before the renames, so the metadata hash can never
+        # describe data that was lost from the page cache. The metadata is renamed
+        # last: it never claims PROCESSED while the Level-0 data is still in place.
+        tmp_file = input_file + ".tmp"  # Builds temporary data path
+        tmp_meta = input_meta + ".tmp"  # Builds temporary metadata path
+        self._io.write_files(
+            [
+                (tmp_file, npy_buffer),
+                (tmp_meta, jsonio.dumps(meta)),
+            ],
+            direct_paths={tmp_file},
+            sync=True,
+        )
+        os.replace(tmp_file, input_file)  # Atomically swaps in the processed data
+        os.replace(tmp_meta, input_meta)  # ...then the record that describes it
             
         # Step 4: Finalize the log for the audit trail
         audit_log.info(f"[PROCESS] SUCCESS: {product_id} is now Level-1 certified. New Hash: {new_hash}")  # Logs processing success
@@ -1,9 +1,19 @@
 import os  # For filesystem operations
-import json  # For metadata operations 
-import shutil  # For file copying
+import asyncio  # For overlapped archiving
+import io  # For in-memory tar members
+import tarfile  # For batch containers
+import uuid  # For default batch IDs
+from concurrent.futures import ProcessPoolExecutor  # For batch archiving
+from typing import List, Optional
+
+import numpy as np  # For serializing in-memory products
 
 from secure_eo_pipeline import config  # For path settings
+from secure_eo_pipeline.db import sqlite_adapter  # For per-worker audit connections
+from secure_eo_pipeline.db import catalog  # For the searchable product catalog
 from secure_eo_pipeline.utils import security  # For encryption and decryption
+from secure_eo_pipeline.utils import jsonio  # For fast metadata I/O
+from secure_eo_pipeline.utils import fileops  # For in-kernel encrypted copies
 from secure_eo_pipeline.utils.logger import audit_log  # For event logging
 
 # =============================================================================
@@ -23,13 +33,66 @@ from secure_eo_pipeline.utils.logger import audit_log  # For event logging
 # hardware theft or unauthorized disk access.
 # =============================================================================
 
+def _archive_worker_init() -> None:
+    
+    """
+    Prepares a batch-archiving worker process.
+    The audit database connection inherited from the parent cannot be shared
+    across processes, so each worker opens its own on first use.
+    The key is read once here and reused for every product the worker handles.
+    """
+    
+    sqlite_adapter.reset_connection()
+    catalog.reset_connection()
+    security.load_key()
+
+
 class ArchiveManager:
     
     """
     Manages the long-term secure storage, encryption, and retrieval of EO products.
     """
 
-    def archive_product(self, product_id, cleanup=True):  # Defines `archive_product` with `cleanup` flag
+    def __init__(self):
+        
+        """
+        Resolves the zone directories once. Every archive/retrieve call builds
+        several paths per product; plain concatenation onto a precomputed prefix
+        is cheaper than os.path.join on each call.
+        """
+        
+        self._arch_prefix = os.path.join(config.ARCHIVE_DIR, "")  # ARCHIVE_DIR + separator
+        self._proc_prefix = os.path.join(config.PROCESSING_DIR, "")  # PROCESSING_DIR + separator
+
+    def archive_products(self, product_ids: List[str], cleanup: bool = True, max_workers: Optional[int] = None) -> List[Optional[str]]:
+        
+        """
+        Archives a batch of products in parallel worker processes.
+        
+        ARGUMENTS:
+            product_ids (list): The IDs of the processed products to archive.
+            cleanup (bool): Passed through to archive_product().
+            max_workers (int): Worker processes (default: CPU count).
+            
+        RETURNS:
+            list: archive_product() results, in the same order as `product_ids`.
+            
+        RATIONALE:
+        Encryption is the dominant cost of archiving and products are independent,
+        so one product per core scales close to linearly. Products are handed out
+        in chunks to amortize the inter-process overhead.
+        """
+        
+        if not product_ids:
+            return []
+        # Make sure the key exists before forking, so workers never race to create it
+        security.load_key()
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(product_ids) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_archive_worker_init) as executor:
+            return list(executor.map(self.archive_product, product_ids, [cleanup] * len(product_ids), chunksize=chunksize))
+
+    def archive_product(self, product_id, cleanup=True, meta=None):  # Defines `archive_product` with `cleanup` flag
         
         """
         Encrypts a processed product and moves it into the permanent archive.
@@ -37,46 +100,48 @@ class ArchiveManager:
         ARGUMENTS:
             product_id (str): The unique ID of the product to be archived.
             cleanup (bool): If True, remove cleartext staging files after archiving.
+            meta (dict, optional): The product's current metadata, if the caller
+                already holds it. Skips re-reading and re-parsing the staging copy.
             
         RETURNS:
             str: The path to the newly created encrypted archive file.
         """
         
         # Step 1: Define the Source Paths (where the data is currently located after processing)
-        source_file = os.path.join(config.PROCESSING_DIR, f"{product_id}.npy")  # Builds source data path
-        source_meta = os.path.join(config.PROCESSING_DIR, f"{product_id}.json")  # Builds source metadata path
+        source_file = f"{self._proc_prefix}{product_id}.npy"  # Builds source data path
+        source_meta = f"{self._proc_prefix}{product_id}.json"  # Builds source metadata path
         
         # Step 2: Environmental Check - Ensure the Archive Vault folder exists on the disk
-        if not os.path.exists(config.ARCHIVE_DIR):  # Creates archive directory if missing
-            # Create the directory if it's missing (Secure Initialization)
-            os.makedirs(config.ARCHIVE_DIR)
+        # (Secure Initialization; checked once per process)
+        jsonio.ensure_dir(config.ARCHIVE_DIR)  # Creates archive directory if missing
             
         # Step 3: Define the Destination Paths in the Archive folder
         # Note: We change the extension to .enc to signify that it is now ENCRYPTED.
-        dest_file = os.path.join(config.ARCHIVE_DIR, f"{product_id}.enc")  # Builds encrypted data path
-        dest_meta = os.path.join(config.ARCHIVE_DIR, f"{product_id}.json")  # Builds archive metadata path
+        dest_file = f"{self._arch_prefix}{product_id}.enc"  # Builds encrypted data path
+        dest_meta = f"{self._arch_prefix}{product_id}.json"  # Builds archive metadata path
         
         # Step 4: Log the initiation of the archiving event
-        audit_log.info(f"[ARCHIVE] START: Securing product {product_id} in the vault...")  # Logs archive start
+        # (%-style arguments: the message is only formatted if INFO is enabled)
+        audit_log.info("[ARCHIVE] START: Securing product %s in the vault...", product_id)  # Logs archive start
         
         # ---------------------------------------------------------------------
         # PHASE 1: ENCRYPTION FLOW
         # ---------------------------------------------------------------------
-        # RATIONALE: We copy first, then encrypt the copy. This leaves a
-        # temporary cleartext backup in the processing zone until it's cleared.
+        # RATIONALE: The cleartext is streamed through AES-256-GCM straight into
+        # the vault. Plaintext never touches the archive disk, and every byte is
+        # written once. The processing zone keeps its cleartext copy until cleanup.
         
         try:
-            # 1. Physically copy the binary data to the archive location
-            shutil.copy(source_file, dest_file)  # Copies data file into archive
-            
-            # 2. PERFORM IN-PLACE ENCRYPTION (Fernet).
-            # This calls our security utility to scramble the bits using the master key.
-            # After this line executes, 'dest_file' becomes unreadable noise on the disk.
-            security.encrypt_file(dest_file)  # Encrypts the copied file in place
+            # STREAMING ENCRYPTION (AES-256-GCM): read block -> encrypt -> write.
+            # After this line executes, 'dest_file' contains only ciphertext.
+            # The ciphertext is bound to the product ID (GCM associated data), so a
+            # file swapped in under another product's name fails to decrypt.
+            # Compressed first (when zstandard is available): fewer bytes to encrypt and write.
+            compression = security.encrypt_file_to(source_file, dest_file, context=product_id, compress=True)  # Encrypts into the archive
             
         except Exception as e:
             # Handle encryption or filesystem errors (e.g., Disk Full)
-            audit_log.error(f"[ARCHIVE] FATAL ERROR: Encryption failed for {product_id}. {e}")  # Logs encryption failure
+            audit_log.error("[ARCHIVE] FATAL ERROR: Encryption failed for %s. %s", product_id, e)  # Logs encryption failure
             return None
 
         # ---------------------------------------------------------------------
@@ -85,44 +150,377 @@ class ArchiveManager:
         # RATIONALE: Metadata (the .json) is generally NOT encrypted.
         # Why? Because ground segment operators need to be able to "search" 
         # the catalog (e.g., "Find all images over Italy") without needing 
-        # to decrypt every single file in the archive first.
+        # to decrypt every single file in the archive first. With USE_SQLITE the
+        # record goes into the indexed SQLite catalog (db/catalog.py) so such
+        # searches are index lookups instead of parsing one .json per product.
         
         try:  # Starts try block for metadata update
-            # 1. Load the existing metadata dictionary
-            with open(source_meta, "r") as f:  # Opens source metadata file
-                meta = json.load(f)  # Loads metadata JSON
+            # 1. Load the existing metadata dictionary (unless the caller handed it over)
+            if meta is None:
+                meta = jsonio.load_file(source_meta)  # Loads metadata JSON
+            else:
+                meta = dict(meta)  # Never modify the caller's copy
                 
-            # 2. Update the status and record the physical path of the encrypted file
-            meta["status"] = "ARCHIVED"  # Sets status to ARCHIVED
-            meta["confidentiality"] = "HIGH (Fernet AES-128-CBC + HMAC-SHA256)"  # Sets confidentiality label
-            meta["archived_path"] = dest_file  # Stores archived file path
-            
-            # 3. Save the final "Archived Record" into the Vault
-            with open(dest_meta, "w") as f:  # Writes metadata into archive directory
-                json.dump(meta, f, indent=4)
+            # 2. Mark it archived and save the "Archived Record" into the Vault
+            meta["compression"] = compression or "none"  # Reversed automatically on retrieval
+            self._write_archive_record(product_id, meta, dest_file, dest_meta)
                 
         except Exception as e:
             # Log errors in cataloging
-            audit_log.error(f"[ARCHIVE] ERROR: Failed to update catalog for {product_id}. {e}")  # Logs metadata update failure
+            audit_log.error("[ARCHIVE] ERROR: Failed to update catalog for %s. %s", product_id, e)  # Logs metadata update failure
 
         # Step 5: Optionally remove cleartext artifacts from the processing zone
         if cleanup:  # Checks cleanup flag
-            try:  # Starts try block for deletions
-                if os.path.exists(source_file):  # Removes the cleartext data file if present
-                    os.remove(source_file)
-                if os.path.exists(source_meta):  # Removes the cleartext metadata if present
-                    os.remove(source_meta)
-            except Exception as e:
-                audit_log.warning(f"[ARCHIVE] WARNING: Could not remove staging files for {product_id}. {e}")  # Logs warning if cleanup fails
+            self._remove_staging(product_id)  # Removes the cleartext data and metadata
         
         # Step 6: Finalize the log for the audit trail
-        audit_log.info(f"[ARCHIVE] SUCCESS: Product {product_id} is now encrypted and vaulted.")  # Logs archive success
+        audit_log.info("[ARCHIVE] SUCCESS: Product %s is now encrypted and vaulted.", product_id)  # Logs archive success
         
         # Return the path to the encrypted asset
         return dest_file
 
 
 
+    async def archive_product_async(self, product_id: str, cleanup: bool = True) -> Optional[str]:
+        
+        """
+        Same result as archive_product(), with the independent steps overlapped.
+        
+        ARGUMENTS:
+            product_id (str): The unique ID of the product to be archived.
+            cleanup (bool): If True, remove cleartext staging files after archiving.
+            
+        RETURNS:
+            str: The path to the encrypted archive file, or None on failure.
+            
+        RATIONALE:
+        archive_product() runs encrypt -> read metadata -> write record strictly
+        one after the other. The metadata read does not depend on the encryption,
+        so both run at once in worker threads (file I/O and OpenSSL release the
+        GIL), and many products can be awaited together from one event loop.
+        """
+        
+        source_file = f"{self._proc_prefix}{product_id}.npy"
+        source_meta = f"{self._proc_prefix}{product_id}.json"
+        jsonio.ensure_dir(config.ARCHIVE_DIR)
+        dest_file = f"{self._arch_prefix}{product_id}.enc"
+        dest_meta = f"{self._arch_prefix}{product_id}.json"
+        audit_log.info("[ARCHIVE] START: Securing product %s in the vault...", product_id)
+        
+        # Data path (CPU-bound AES) and metadata read (I/O) in parallel
+        compression, meta = await asyncio.gather(
+            asyncio.to_thread(security.encrypt_file_to, source_file, dest_file, product_id, True),
+            asyncio.to_thread(jsonio.load_file, source_meta),
+            return_exceptions=True,
+        )
+        if isinstance(compression, Exception):
+            audit_log.error("[ARCHIVE] FATAL ERROR: Encryption failed for %s. %s", product_id, compression)
+            return None
+        
+        try:
+            if isinstance(meta, Exception):
+                raise meta
+            meta["compression"] = compression or "none"
+            await asyncio.to_thread(self._write_archive_record, product_id, meta, dest_file, dest_meta)
+        except Exception as e:
+            audit_log.error("[ARCHIVE] ERROR: Failed to update catalog for %s. %s", product_id, e)
+        
+        if cleanup:
+            await asyncio.to_thread(self._remove_staging, product_id)
+        audit_log.info("[ARCHIVE] SUCCESS: Product %s is now encrypted and vaulted.", product_id)
+        return dest_file
+
+    def archive_product_overlapped(self, product_id: str, cleanup: bool = True) -> Optional[str]:
+        
+        """
+        Synchronous entry point to archive_product_async() (for callers without an event loop).
+        """
+        
+        return asyncio.run(self.archive_product_async(product_id, cleanup))
+
+    def _remove_staging(self, product_id: str) -> None:
+        
+        """
+        Removes a product's cleartext data and metadata from the processing zone.
+        """
+        
+        # EAFP: just try to delete; a file that is already gone is not an error
+        for ext in (".npy", ".json"):
+            try:
+                os.remove(self._proc_prefix + product_id + ext)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                audit_log.warning("[ARCHIVE] WARNING: Could not remove staging files for %s. %s", product_id, e)  # Logs warning if cleanup fails
+
+    @staticmethod
+    def _write_archive_record(product_id: str, meta: dict, dest_file: str, dest_meta: str) -> None:
+        
+        """
+        Marks `meta` as archived (in place) and publishes it as the product's catalog record:
+        a row in the SQLite catalog, or `dest_meta` (.json) when SQLite is disabled.
+        """
+        
+        # Update the status and record the physical path of the encrypted file
+        meta["status"] = "ARCHIVED"  # Sets status to ARCHIVED
+        meta["confidentiality"] = "HIGH (AES-256-GCM, bound to product_id)"  # Sets confidentiality label
+        meta["archived_path"] = dest_file  # Stores archived file path
+        
+        if getattr(config, "USE_SQLITE", False):
+            catalog.upsert(product_id, meta)  # One small INSERT into the indexed catalog
+            return
+        
+        # File-only mode: written beside the target and renamed into place (a
+        # metadata-only os.replace), so the catalog never exposes a half-written record.
+        jsonio.dump_file(meta, dest_meta + ".tmp")  # Writes metadata into archive directory
+        os.replace(dest_meta + ".tmp", dest_meta)  # Publishes the record atomically
+
+    def open_archive_writer(self, product_id: str) -> security.GCMStreamWriter:
+        
+        """
+        Opens a write-only file object that encrypts straight into the product's vault file.
+        
+        ARGUMENTS:
+            product_id (str): The product being archived (the ciphertext is bound to it).
+            
+        RETURNS:
+            GCMStreamWriter: use it in a `with` block; the archive appears when it closes.
+            
+        RATIONALE:
+        archive_product() encrypts a cleartext .npy that processing first wrote
+        to the staging zone. A producer holding the array in memory can instead
+        serialize into this writer (e.g. np.save), so the cleartext never hits
+        the disk and the product is written once instead of twice.
+        """
+        
+        jsonio.ensure_dir(config.ARCHIVE_DIR)  # Creates archive directory if missing
+        dest_file = f"{self._arch_prefix}{product_id}.enc"
+        return security.open_encrypted_writer(dest_file, context=product_id)
+
+    def archive_array(self, product_id: str, data: np.ndarray, meta: dict) -> Optional[str]:
+        
+        """
+        Archives an in-memory product directly, without a cleartext staging file.
+        
+        ARGUMENTS:
+            product_id (str): The unique ID of the product.
+            data (np.ndarray): The processed raster.
+            meta (dict): The product's metadata (not modified).
+            
+        RETURNS:
+            str: The path to the encrypted archive file, or None on failure.
+        """
+        
+        audit_log.info("[ARCHIVE] START: Securing product %s in the vault (direct stream)...", product_id)
+        try:
+            with self.open_archive_writer(product_id) as writer:
+                np.save(writer, data, allow_pickle=False)  # .npy bytes go straight into AES-GCM
+            dest_file = writer.dest_path
+        except Exception as e:
+            audit_log.error("[ARCHIVE] FATAL ERROR: Encryption failed for %s. %s", product_id, e)
+            return None
+        
+        try:
+            dest_meta = f"{self._arch_prefix}{product_id}.json"
+            self._write_archive_record(product_id, dict(meta), dest_file, dest_meta)
+        except Exception as e:
+            audit_log.error("[ARCHIVE] ERROR: Failed to update catalog for %s. %s", product_id, e)
+        
+        audit_log.info("[ARCHIVE] SUCCESS: Product %s is now encrypted and vaulted.", product_id)
+        return dest_file
+
+    def archive_batch(self, product_ids: List[str], batch_id: Optional[str] = None, cleanup: bool = True) -> Optional[str]:
+        
+        """
+        Archives many products into ONE encrypted container plus one index.
+        
+        ARGUMENTS:
+            product_ids (list): The IDs of the processed products to archive.
+            batch_id (str, optional): Name of the container (generated if omitted).
+            cleanup (bool): If True, remove cleartext staging files after archiving.
+            
+        RETURNS:
+            str: The path to the container (<batch_id>.eob), or None on failure.
+            
+        RATIONALE:
+        For many small products, the per-file cost (a cipher setup, a small
+        AES call, two directory entries and their metadata) outweighs the
+        encryption itself. Here the products (.npy + .json) are written as a
+        single tar stream and encrypted in large segments, with one file in
+        the vault. The index (<batch_id>.index.json) maps every product to its
+        byte range, so retrieve_from_batch() decrypts only the segments it needs.
+        """
+        
+        batch_id = batch_id or f"batch_{uuid.uuid4().hex[:12]}"
+        jsonio.ensure_dir(config.ARCHIVE_DIR)  # Creates archive directory if missing
+        dest_file = f"{self._arch_prefix}{batch_id}.eob"  # Builds container path
+        dest_index = f"{self._arch_prefix}{batch_id}.index.json"  # Builds index path
+        audit_log.info("[ARCHIVE] START: Securing %d products in batch container %s...", len(product_ids), batch_id)
+        
+        # PHASE 1: Stream every product through tar -> segmented AES-256-GCM
+        index = {"batch_id": batch_id, "container": dest_file, "products": {}}
+        archived = []
+        writer = security.EncryptingWriter(dest_file, batch_id)
+        try:
+            # USTAR keeps every member header a single 512-byte block, so the
+            # header in front of each member can be checked on retrieval.
+            with tarfile.open(fileobj=writer, mode="w|", format=tarfile.USTAR_FORMAT,
+                              bufsize=security.BATCH_SEGMENT_SIZE) as tar:
+                for product_id in product_ids:
+                    source_file = f"{self._proc_prefix}{product_id}.npy"
+                    source_meta = f"{self._proc_prefix}{product_id}.json"
+                    try:
+                        meta = jsonio.load_file(source_meta)
+                        data_range = self._add_member(tar, f"{product_id}.npy", source_file)
+                    except OSError as e:
+                        audit_log.error("[ARCHIVE] ERROR: Skipping %s in batch %s. %s", product_id, batch_id, e)
+                        continue
+                    
+                    meta["status"] = "ARCHIVED"
+                    meta["confidentiality"] = "HIGH (AES-256-GCM, batch container)"
+                    meta["archived_path"] = dest_file
+                    meta_range = self._add_member(tar, f"{product_id}.json", None, jsonio.dumps(meta))
+                    index["products"][product_id] = {"data": data_range, "meta": meta_range, "metadata": meta}
+                    archived.append(product_id)
+            writer.close()  # Seals the last segment and publishes the container
+        except Exception as e:
+            writer.abort()
+            audit_log.error("[ARCHIVE] FATAL ERROR: Batch encryption failed for %s. %s", batch_id, e)
+            return None
+        
+        if not archived:
+            os.remove(dest_file)
+            audit_log.error("[ARCHIVE] FATAL ERROR: Batch %s contained no archivable product.", batch_id)
+            return None
+        
+        # PHASE 2: Publish the index (cleartext, searchable, like the per-product records)
+        jsonio.dump_file(index, dest_index + ".tmp")
+        os.replace(dest_index + ".tmp", dest_index)
+        
+        # PHASE 3: List the products in the catalog (searchable like single
+        # archives), only now that the container and its index are in place:
+        # a batch that fails part-way must not leave records pointing at nothing
+        if getattr(config, "USE_SQLITE", False):
+            for product_id in archived:
+                catalog.upsert(product_id, index["products"][product_id]["metadata"])
+        
+        # PHASE 4: Remove cleartext artifacts of the archived products
+        if cleanup:
+            for product_id in archived:
+                self._remove_staging(product_id)
+        
+        audit_log.info("[ARCHIVE] SUCCESS: %d products encrypted and vaulted in %s.", len(archived), batch_id)
+        return dest_file
+
+    @staticmethod
+    def _add_member(tar: tarfile.TarFile, name: str, path: Optional[str], data: Optional[bytes] = None) -> List[int]:
+        
+        """
+        Appends one file (from `path`, or the bytes in `data`) to the tar stream.
+        
+        RETURNS:
+            list: [offset, size] of the member's contents in the plaintext stream.
+        """
+        
+        if path is not None:
+            with open(path, "rb") as f:
+                info = tar.gettarinfo(arcname=name, fileobj=f)
+                tar.addfile(info, f)
+        else:
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+        # tar.offset is now just past the member's (block-padded) contents
+        padded = -(-info.size // tarfile.BLOCKSIZE) * tarfile.BLOCKSIZE
+        return [tar.offset - padded, info.size]
+
+    def retrieve_from_batch(self, batch_id: str, product_id: str, output_path: str) -> bool:
+        
+        """
+        Delivers a decrypted copy of one product stored in a batch container.
+        
+        Only the container segments covering the product (and its tar header)
+        are read and decrypted. The header is authenticated like the data and
+        must name this product, so a tampered index cannot substitute another one.
+        """
+        
+        container = f"{self._arch_prefix}{batch_id}.eob"
+        audit_log.info("[ARCHIVE] START: Retrieving %s from batch %s for user delivery...", product_id, batch_id)
+        try:
+            index = jsonio.load_file(f"{self._arch_prefix}{batch_id}.index.json")
+            entry = index["products"].get(product_id)
+            if entry is None:
+                audit_log.error("[ARCHIVE] RETRIEVAL FAILED: %s not found in batch %s.", product_id, batch_id)
+                return False
+            
+            offset, size = entry["data"]
+            block = security.decrypt_range(container, offset - tarfile.BLOCKSIZE, tarfile.BLOCKSIZE + size)
+            header = tarfile.TarInfo.frombuf(block[:tarfile.BLOCKSIZE], tarfile.ENCODING, "surrogateescape")
+            if header.name != f"{product_id}.npy" or header.size != size:
+                raise ValueError(f"Index entry for {product_id} does not match the container.")
+            
+            with open(output_path, "wb") as f:
+                f.write(block[tarfile.BLOCKSIZE:])
+            audit_log.info("[ARCHIVE] SUCCESS: %s decrypted and delivered to %s", product_id, output_path)
+            return True
+        except FileNotFoundError:
+            audit_log.error("[ARCHIVE] RETRIEVAL FAILED: batch %s not found in storage.", batch_id)
+            return False
+        except Exception as e:
+            audit_log.error("[ARCHIVE] FATAL: Decryption failed during retrieval. %s", e)
+            return False
+
+    def verify_product(self, product_id: str) -> bool:
+        
+        """
+        Checks that a product's archive file is intact and still bound to it.
+        
+        RETURNS:
+            bool: True if the file authenticates, False if it is missing, corrupted or swapped.
+        """
+        
+        archive_file = f"{self._arch_prefix}{product_id}.enc"
+        try:
+            intact = security.verify_file(archive_file, context=product_id)
+        except FileNotFoundError:
+            audit_log.error("[ARCHIVE] VERIFY FAILED: %s not found in storage.", product_id)
+            return False
+        if intact:
+            audit_log.info("[ARCHIVE] VERIFIED: %s authenticates (AES-GCM tag).", product_id)
+        else:
+            audit_log.error("[ARCHIVE] INTEGRITY FAILURE: %s does not authenticate.", product_id)
+        return intact
+
+    def retrieve_encrypted(self, product_id: str, output_path: str) -> bool:
+        
+        """
+        Delivers the archived product still ENCRYPTED (e.g. for mirroring or off-site replication).
+        
+        ARGUMENTS:
+            product_id (str): The product being requested.
+            output_path (str): Where the encrypted copy should be written.
+            
+        RATIONALE:
+        A mirror only needs the ciphertext, so nothing is decrypted and the key
+        is never touched. The bytes are copied in-kernel (copy_file_range, or
+        sendfile via shutil on older kernels), never passing through user space.
+        """
+        
+        archive_file = f"{self._arch_prefix}{product_id}.enc"
+        try:
+            fileops.copy_file(archive_file, output_path)
+        except FileNotFoundError as e:
+            if e.filename == archive_file:
+                audit_log.error("[ARCHIVE] RETRIEVAL FAILED: %s not found in storage.", product_id)
+            else:
+                audit_log.error("[ARCHIVE] FATAL: Delivery path unavailable during retrieval. %s", e)
+            return False
+        except OSError as e:
+            audit_log.error("[ARCHIVE] FATAL: Encrypted copy of %s failed. %s", product_id, e)
+            return False
+        audit_log.info("[ARCHIVE] SUCCESS: Encrypted %s delivered to %s", product_id, output_path)
+        return True
+
     def retrieve_product(self, product_id, output_path):
         
         """
@@ -134,34 +532,37 @@ class ArchiveManager:
             
         LOGIC:
         The Master Archive is "Write-Only" for encryption. We never decrypt 
-        the master copy itself. Instead, we decrypt a CLONE delivered to the user.
+        the master copy in place. Instead, a decrypted COPY is delivered to the user.
         """
         
         # Step 1: Identify the location of the encrypted master file
-        archive_file = os.path.join(config.ARCHIVE_DIR, f"{product_id}.enc")  # Builds the encrypted archive file path
+        archive_file = f"{self._arch_prefix}{product_id}.enc"  # Builds the encrypted archive file path
         
-        # Step 2: Verification - Does the product exist in the vault?
-        if not os.path.exists(archive_file):  # Checks if the archive file exists
-            audit_log.error(f"[ARCHIVE] RETRIEVAL FAILED: {product_id} not found in storage.")  # Logs retrieval failure if missing
-            return False
-            
-        # Step 3: Log the retrieval request
-        audit_log.info(f"[ARCHIVE] START: Retrieving and decrypting {product_id} for user delivery...")  # Logs retrieval start
+        # Step 2: Log the retrieval request.
+        # Existence is not pre-checked (an extra stat, and racy): opening the
+        # archive below raises FileNotFoundError if the product is not in the vault.
+        audit_log.info("[ARCHIVE] START: Retrieving and decrypting %s for user delivery...", product_id)  # Logs retrieval start
         
         try:  # Starts try block for retrieval
-            # 1. CLONING: Copy the encrypted file to the user's requested output path.
-            # This preserves the security of the primary archive.
-            shutil.copy(archive_file, output_path)  # Copies the encrypted file to output path
-            
-            # 2. DECRYPTION: Call the security utility to restore the clone to readable state.
+            # DECRYPTION: Decrypt the (memory-mapped) master copy straight into the
+            # user's requested output path. The master file itself is never modified,
+            # and no intermediate encrypted clone is written.
             # This operation requires the symmetric key.
-            security.decrypt_file(output_path)  # Decrypts the copied file
+            security.decrypt_file_to(archive_file, output_path, context=product_id)  # Decrypts into the output path
             
             # Log success
-            audit_log.info(f"[ARCHIVE] SUCCESS: {product_id} decrypted and delivered to {output_path}")  # Logs retrieval success
+            audit_log.info("[ARCHIVE] SUCCESS: %s decrypted and delivered to %s", product_id, output_path)  # Logs retrieval success
             return True  # Returns True to indicate success
             
+        except FileNotFoundError as e:
+            if e.filename != archive_file:
+                audit_log.error("[ARCHIVE] FATAL: Delivery path unavailable during retrieval. %s", e)  # Logs bad output path
+                return False
+            # Verification - the product does not exist in the vault
+            audit_log.error("[ARCHIVE] RETRIEVAL FAILED: %s not found in storage.", product_id)  # Logs retrieval failure if missing
+            return False
+            
         except Exception as e:
             # Handle decryption failures (e.g., key mismatch or corrupted archive)
-            audit_log.error(f"[ARCHIVE] FATAL: Decryption failed during retrieval. {e}")  # Logs fatal decryption failure
+            audit_log.error("[ARCHIVE] FATAL: Decryption failed during retrieval. %s", e)  # Logs fatal decryption failure
             return False
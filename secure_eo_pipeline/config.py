@@ -50,11 +50,24 @@ BACKUP_DIR = os.path.join(BASE_DIR, "backup_storage")  # Defines `BACKUP_DIR` pa
 # SECURITY LEVEL: HIGH (Contains credentials and security telemetry).
 SQLITE_DB_PATH = os.path.join(BASE_DIR, "eo_security.db")
 
+# [Product Catalog]
+# Indexed SQLite catalog of archived products (searchable cleartext metadata).
+# SECURITY LEVEL: MEDIUM (No pixel data; operators may query it).
+CATALOG_DB = os.path.join(BASE_DIR, "catalog.db")
+
 # Path to the symmetric encryption key file.
 # WARNING: This is a critical security asset. In this simulation, it's a local file.
 # In a real system, this would be managed by an HSM (Hardware Security Module).
 KEY_PATH = "secret.key"  # Defines `KEY_PATH` for the encryption key
 
+# Fingerprint used by backup integrity audits: "sha256" (same as ingestion),
+# "sha256-tree" (SHA-256 of 8 MiB parts hashed on all cores, then of their
+# digests) or "blake3" (several times faster on SIMD CPUs; needs the optional
+# 'blake3' package, SHA-256 is used without it). Tree and BLAKE3 fingerprints
+# are stored as "sha256-tree:<hex>" / "blake3:<hex>", so audits always know
+# which algorithm a reference hash was made with.
+INTEGRITY_HASH_ALGO = os.getenv("EO_INTEGRITY_HASH", "sha256").lower()
+
 # Helper list of all system directories.
 # The application uses this list to automatically create the folder structure at startup.
 directories = [INGEST_DIR, PROCESSING_DIR, ARCHIVE_DIR, BACKUP_DIR]  # Defines `directories` list of paths
@@ -82,6 +95,10 @@ MODE = os.getenv("EO_PIPELINE_MODE", "SECURE").upper()
 MAX_FAILED_LOGINS = int(os.getenv("EO_MAX_FAILED_LOGINS", "5"))
 LOCKOUT_SECONDS = int(os.getenv("EO_LOCKOUT_SECONDS", "60"))
 
+# Lifetime of the signed session token issued after a successful login.
+# Within this window, authorization checks skip the user lookup entirely.
+SESSION_TTL_SECONDS = int(os.getenv("EO_SESSION_TTL_SECONDS", "900"))
+
 # Define the Roles and their associated permissions
 ROLES = {
     # 'admin' role: The highest level of trust. Can manage the security core itself.
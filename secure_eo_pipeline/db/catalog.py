@@ -0,0 +1,190 @@
+import sqlite3
+import os
+import threading
+from typing import Optional, Dict, Any, List
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.utils import jsonio
+
+try:
+    import msgpack  # Optional compact binary codec
+    HAVE_MSGPACK = True
+except ImportError:
+    HAVE_MSGPACK = False
+
+
+# =============================================================================
+# Product Catalog
+# =============================================================================
+# PURPOSE:
+# The searchable (cleartext) record of every archived product.
+#
+# DESIGN RATIONALE:
+# One .json per product means any query ("all products from sensor X after
+# date Y") opens and parses every file: O(N) per query. Here each record is one
+# row, with the fields operators filter on stored as indexed columns, so a
+# query is a B-tree lookup, and archiving a product is a single small INSERT.
+# The full metadata record is kept alongside for exact round-trips.
+#
+# Records are stored as MessagePack when the optional 'msgpack' package is
+# installed (about half the bytes of JSON and several times faster to pack and
+# unpack), as JSON otherwise; both decode transparently. export_json() re-emits
+# the whole catalog as readable JSON for operators.
+#
+# The catalog lives in its own database, apart from the security database
+# (credentials, audit trail), so operators can be given read access to it alone.
+# =============================================================================
+
+# Open connections, by database path (one per process; see reset_connection)
+_CONNECTIONS: Dict[str, sqlite3.Connection] = {}
+_WRITE_LOCK = threading.Lock()
+
+
+def get_connection() -> sqlite3.Connection:
+    """
+    Returns the catalog connection for config.CATALOG_DB, creating the schema if needed.
+    """
+    path = config.CATALOG_DB
+    conn = _CONNECTIONS.get(path)
+    if conn is None:
+        with _WRITE_LOCK:
+            conn = _CONNECTIONS.get(path)
+            if conn is None:
+                jsonio.ensure_dir(os.path.dirname(path) or ".")
+                conn = sqlite3.connect(path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                # WAL: readers never block the archiver; NORMAL is durable across
+                # application crashes and only syncs at checkpoints.
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                _initialize_schema(conn)
+                _CONNECTIONS[path] = conn
+    return conn
+
+
+def reset_connection() -> None:
+    """
+    Forgets the cached connections without closing them (for forked workers).
+    """
+    global _WRITE_LOCK
+    _CONNECTIONS.clear()
+    _WRITE_LOCK = threading.Lock()
+
+
+def _initialize_schema(conn: sqlite3.Connection) -> None:
+    """
+    Creates the products table and its query indexes if they do not exist.
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS products (
+            id TEXT PRIMARY KEY,
+            status TEXT,
+            confidentiality TEXT,
+            archived_path TEXT,
+            sensor TEXT,
+            acquisition_time REAL,
+            meta_json BLOB NOT NULL  -- MessagePack or JSON, see _decode()
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_sensor ON products (sensor, acquisition_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_time ON products (acquisition_time)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_products_status ON products (status)")
+    conn.commit()
+
+
+def _encode(meta: Dict[str, Any]) -> bytes:
+    """
+    Serializes a record (MessagePack if available, else JSON).
+    """
+    if HAVE_MSGPACK:
+        # jsonio's hook also turns NumPy scalars into plain Python values here
+        return msgpack.packb(meta, use_bin_type=True, default=jsonio._default)
+    return jsonio.dumps(meta)
+
+
+def _decode(blob: bytes) -> Dict[str, Any]:
+    """
+    Parses a stored record. A JSON object starts with "{", which is never the
+    first byte of a MessagePack map, so both formats can coexist in one table.
+    """
+    if blob[:1] == b"{":
+        return jsonio.loads(blob)
+    if not HAVE_MSGPACK:
+        raise RuntimeError("Catalog record is MessagePack; install the 'msgpack' package to read it.")
+    return msgpack.unpackb(blob, raw=False)
+
+
+def upsert(product_id: str, meta: Dict[str, Any]) -> None:
+    """
+    Inserts or replaces the catalog record of a product.
+    """
+    conn = get_connection()
+    with _WRITE_LOCK:
+        conn.execute(
+            """
+            INSERT OR REPLACE INTO products
+                (id, status, confidentiality, archived_path, sensor, acquisition_time, meta_json)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                product_id,
+                meta.get("status"),
+                meta.get("confidentiality"),
+                meta.get("archived_path"),
+                meta.get("sensor"),
+                meta.get("timestamp"),
+                _encode(meta),
+            ),
+        )
+        conn.commit()
+
+
+def get(product_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Returns the stored metadata of a product, or None if it is not catalogued.
+    """
+    row = get_connection().execute(
+        "SELECT meta_json FROM products WHERE id = ?", (product_id,)
+    ).fetchone()
+    return _decode(row["meta_json"]) if row else None
+
+
+def search(
+    sensor: Optional[str] = None,
+    status: Optional[str] = None,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Returns the metadata of all products matching every given filter,
+    ordered by acquisition time. Time bounds are UNIX timestamps (inclusive).
+    """
+    clauses, params = [], []
+    for column, op, value in (
+        ("sensor", "=", sensor),
+        ("status", "=", status),
+        ("acquisition_time", ">=", start_time),
+        ("acquisition_time", "<=", end_time),
+    ):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    where = " WHERE " + " AND ".join(clauses) if clauses else ""
+    rows = get_connection().execute(
+        f"SELECT meta_json FROM products{where} ORDER BY acquisition_time", params
+    ).fetchall()
+    return [_decode(r["meta_json"]) for r in rows]
+
+
+def export_json(path: str) -> int:
+    """
+    Writes every catalog record to `path` as a human-readable JSON object
+    keyed by product ID. Returns the number of records exported.
+    """
+    rows = get_connection().execute(
+        "SELECT id, meta_json FROM products ORDER BY acquisition_time"
+    ).fetchall()
+    jsonio.dump_file({r["id"]: _decode(r["meta_json"]) for r in rows}, path)
+    return len(rows)
@@ -1,5 +1,6 @@
 import sqlite3
 import os
+import threading
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 
@@ -7,6 +8,8 @@ from secure_eo_pipeline import config
 
 
 _CONNECTION: Optional[sqlite3.Connection] = None
+# Serializes writes when audit events arrive from worker threads (batch processing)
+_WRITE_LOCK = threading.Lock()
 
 
 def _get_db_path() -> str:
@@ -24,14 +27,31 @@ def get_connection() -> sqlite3.Connection:
     """
     global _CONNECTION
     if _CONNECTION is None:
-        db_path = _get_db_path()
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        _CONNECTION = sqlite3.connect(db_path)
-        _CONNECTION.row_factory = sqlite3.Row
-        _initialize_schema(_CONNECTION)
+        with _WRITE_LOCK:
+            if _CONNECTION is None:
+                db_path = _get_db_path()
+                os.makedirs(os.path.dirname(db_path), exist_ok=True)
+                # The connection is shared by all threads; writers hold _WRITE_LOCK
+                conn = sqlite3.connect(db_path, check_same_thread=False)
+                conn.row_factory = sqlite3.Row
+                _initialize_schema(conn)
+                _CONNECTION = conn
     return _CONNECTION
 
 
+def reset_connection() -> None:
+    """
+    Forgets the cached connection without closing it.
+
+    For forked worker processes: a SQLite connection must not be used across
+    fork(), so each worker opens its own on first use. The parent's
+    connection is left untouched.
+    """
+    global _CONNECTION, _WRITE_LOCK
+    _CONNECTION = None
+    _WRITE_LOCK = threading.Lock()  # The parent's lock may have been held at fork time
+
+
 def _initialize_schema(conn: sqlite3.Connection) -> None:
     """
     Creates the required tables if they do not already exist and seeds
@@ -181,20 +201,21 @@ def insert_audit_event(
     ts: Optional[str] = None,
 ) -> None:
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO audit_events (ts, level, component, user, action, details)
-        VALUES (?, ?, ?, ?, ?, ?)
-        """,
-        (
-            ts or datetime.utcnow().isoformat(),
-            level,
-            component,
-            user,
-            action,
-            details,
-        ),
-    )
-    conn.commit()
+    with _WRITE_LOCK:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            INSERT INTO audit_events (ts, level, component, user, action, details)
+            VALUES (?, ?, ?, ?, ?, ?)
+            """,
+            (
+                ts or datetime.utcnow().isoformat(),
+                level,
+                component,
+                user,
+                action,
+                details,
+            ),
+        )
+        conn.commit()
 
@@ -0,0 +1,124 @@
+import os  # For raw file descriptors
+import errno  # For telling "unsupported" apart from real failures
+import shutil  # For the portable fallback
+
+try:
+    import fcntl  # For the FICLONE reflink ioctl (POSIX only)
+except ImportError:
+    fcntl = None
+
+# =============================================================================
+# File Copy Helpers
+# =============================================================================
+# PURPOSE:
+# The pipeline moves whole products between zones (Landing Zone -> Staging,
+# Archive -> user delivery).
+#
+# DESIGN RATIONALE:
+# shutil.copy() pumps every byte through a Python-level read/write loop.
+# On Linux, copy_file_range() lets the kernel copy directly between the two
+# files without bouncing through user space. On CoW filesystems (btrfs, XFS
+# with reflink, bcachefs) we first ask for a reflink with the FICLONE ioctl:
+# the copy shares the source's extents, a metadata-only operation whose cost
+# does not depend on the file size. Where these calls are missing or refused
+# (non-Linux, cross-device on old kernels, special filesystems), we fall back
+# to shutil.copyfile(), which uses the platform's in-kernel copy where one
+# exists (sendfile, fcopyfile, CopyFile2).
+# =============================================================================
+
+# Errors that mean "this copy method is not usable here", not "the copy failed"
+_UNSUPPORTED = {
+    errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTSUP,
+    errno.ENOTTY, errno.EBADF,  # FICLONE: not a reflink-capable filesystem
+}
+
+# ioctl number of FICLONE (_IOW(0x94, 9, int)), Linux only
+FICLONE = 0x40049409
+
+
+def reflink(src_fd: int, dst_fd: int) -> bool:
+    
+    """
+    Makes `dst_fd` share the extents of `src_fd` (FICLONE). Returns False if unsupported.
+    """
+    
+    if fcntl is None or not hasattr(os, "copy_file_range"):  # Linux-only ioctl
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as e:
+        if e.errno not in _UNSUPPORTED:
+            raise
+        return False
+    return True
+
+
+def copy_fd(src_fd: int, dst_fd: int) -> bool:
+    
+    """
+    Copies an open file into another (empty) one with a reflink, else
+    copy_file_range() from the current offsets. Returns False if neither is
+    usable here (the destination may then hold a partial copy).
+    """
+    
+    if not hasattr(os, "copy_file_range"):
+        return False
+    if not reflink(src_fd, dst_fd):
+        # Ask for the whole file each time; the kernel may copy less per call
+        remaining = max(os.fstat(src_fd).st_size, 1)
+        try:
+            while os.copy_file_range(src_fd, dst_fd, remaining):
+                pass
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+            return False
+    return True
+
+
+def _copy_in_kernel(source_path: str, dest_path: str, durable: bool) -> bool:
+    
+    """
+    Copies with a reflink, else copy_file_range(). Returns False if neither is usable here.
+    """
+    
+    if not hasattr(os, "copy_file_range"):
+        return False
+    with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+        if not copy_fd(src.fileno(), dst.fileno()):
+            return False
+        if durable:
+            os.fdatasync(dst.fileno())
+    return True
+
+
+def _sync_file(path: str) -> None:
+    
+    """
+    Flushes a file's data (and size) to stable storage.
+    """
+    
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fdatasync(fd) if hasattr(os, "fdatasync") else os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def copy_file(source_path: str, dest_path: str, durable: bool = False) -> None:
+    
+    """
+    Copies the contents of `source_path` to `dest_path` (created or truncated).
+    
+    Only the data is copied (like shutil.copyfile); permissions are not.
+    With `durable=True` the copy is on stable storage when this returns
+    (one fdatasync for the whole file, not a sync per chunk), as needed for
+    disaster-recovery copies that must survive a crash.
+    """
+    
+    if not _copy_in_kernel(source_path, dest_path, durable):
+        # shutil.copyfile still avoids user space where it can:
+        # sendfile() on Linux, fcopyfile() on macOS, CopyFile2 on Windows.
+        shutil.copyfile(source_path, dest_path)
+        if durable:
+            _sync_file(dest_path)
@@ -0,0 +1,429 @@
+import os  # For raw file descriptors
+import errno  # For detecting filesystems that reject O_DIRECT
+import mmap  # For page-aligned buffers
+from contextlib import contextmanager  # For scoped page-cache eviction
+from typing import Container, List, Sequence, Tuple, Union
+
+# =============================================================================
+# Batched File I/O Backend
+# =============================================================================
+# PURPOSE:
+# The processing stage reads two files (data + metadata) and later writes them
+# back. Done one by one, every open/read/write is a separate blocking syscall.
+#
+# DESIGN RATIONALE:
+# On Linux with io_uring, all reads (or all writes) of a product are queued in
+# the submission ring and handed to the kernel in ONE io_uring_submit() call.
+# When io_uring is unavailable (non-Linux, old kernel -> ENOSYS, or the optional
+# 'liburing' package is not installed) the same API falls back to plain POSIX
+# calls, so callers never need to know which backend is active.
+#
+# O_DIRECT:
+# Files that are written once and not read back soon (e.g. the processed .npy,
+# which is hashed from memory) can bypass the page cache. O_DIRECT requires
+# block-aligned buffers and lengths, so the data lives in a page-aligned
+# anonymous mapping padded to a whole number of blocks (an AlignedBuffer, either
+# filled in place by the caller or copied here), and the file is truncated back
+# to its true length afterwards.
+# =============================================================================
+
+# Alignment used for O_DIRECT buffers and lengths (a page covers all common block sizes)
+DIRECT_IO_ALIGNMENT = mmap.PAGESIZE
+
+
+class AlignedBuffer:
+
+    """
+    A page-aligned buffer padded to DIRECT_IO_ALIGNMENT, with a logical length.
+
+    Callers can build file contents directly in `raw` (e.g. as a NumPy view);
+    write_files() then issues the O_DIRECT write without an intermediate copy.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        padded = max(DIRECT_IO_ALIGNMENT, -(-size // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT)
+        self.raw = mmap.mmap(-1, padded)  # Anonymous mappings are always page-aligned
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def view(self) -> memoryview:
+
+        """
+        The logical contents (without the padding).
+        """
+
+        return memoryview(self.raw)[:self.size]
+
+
+def _aligned_copy(data) -> AlignedBuffer:
+
+    """
+    Copies `data` into a new AlignedBuffer.
+    """
+
+    buffer = AlignedBuffer(len(data))
+    buffer.raw[:len(data)] = data
+    return buffer
+
+
+def _open_for_write(path: str, direct: bool) -> Tuple[int, bool]:
+
+    """
+    Opens `path` for writing, with O_DIRECT when requested and supported.
+
+    RETURNS:
+        (fd, direct): the descriptor and whether O_DIRECT is actually in effect.
+    """
+
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    if direct and hasattr(os, "O_DIRECT"):
+        try:
+            return os.open(path, flags | os.O_DIRECT, 0o644), True
+        except OSError as e:
+            # tmpfs and some network filesystems refuse O_DIRECT
+            if e.errno != errno.EINVAL:
+                raise
+    return os.open(path, flags, 0o644), False
+
+
+# Staging block of DirectFileWriter (a multiple of DIRECT_IO_ALIGNMENT)
+DIRECT_WRITE_BLOCK = 1024 * 1024
+
+
+def drop_page_cache(fd: int) -> None:
+    
+    """
+    Hints the kernel that a file's cached pages will not be needed again soon.
+    (On Linux this also starts writeback of its dirty pages.) No-op where unsupported.
+    """
+    
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+
+
+@contextmanager
+def evicting_page_cache(fd: int):
+    
+    """
+    Drops a file's cached pages when the block exits: for cold files (archives)
+    read once, e.g. to verify or restore them. Enter it before mapping the
+    file, so the mapping is closed (its pages unpinned) by the time it runs.
+    """
+    
+    try:
+        yield
+    finally:
+        drop_page_cache(fd)
+
+
+def advise_sequential(fd: int) -> None:
+    
+    """
+    Hints the kernel that a file will be read front to back, so it uses a
+    larger readahead window. No-op where unsupported.
+    """
+    
+    if hasattr(os, "posix_fadvise"):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+
+class DirectFileWriter:
+    
+    """
+    Sequential write-only file that bypasses the page cache.
+    
+    With `direct=True` the file is opened with O_DIRECT (where the platform and
+    filesystem allow it): writes are staged in a page-aligned block and issued
+    in whole blocks, and the padding of the last block is truncated away on
+    close(). Otherwise writes go straight to the descriptor and close() asks
+    the kernel to drop the file from the page cache. With `durable=True`,
+    close() also flushes the data to stable storage first (for files about to
+    be renamed over the only other copy of their contents).
+    
+    For files written once and not read back soon (archives): caching them
+    would only evict hot processing data.
+    """
+    
+    def __init__(self, path: str, direct: bool = False, durable: bool = False):
+        self.fd, self.direct = _open_for_write(path, direct)
+        self.durable = durable
+        self._block = AlignedBuffer(DIRECT_WRITE_BLOCK) if self.direct else None
+        self._fill = 0  # Bytes staged in _block
+        self._offset = 0  # File offset of _block
+        self.closed = False
+    
+    def write(self, data) -> int:
+        with memoryview(data) as view, view.cast("B") as flat:
+            if not self.direct:
+                done = 0
+                while done < len(flat):  # Writes may be partial
+                    done += os.write(self.fd, flat[done:])
+                return len(flat)
+            done = 0
+            while done < len(flat):
+                n = min(len(flat) - done, DIRECT_WRITE_BLOCK - self._fill)
+                self._block.raw[self._fill:self._fill + n] = flat[done:done + n]
+                self._fill += n
+                done += n
+                if self._fill == DIRECT_WRITE_BLOCK:
+                    self._flush(DIRECT_WRITE_BLOCK)
+            return len(flat)
+    
+    def _flush(self, length: int) -> None:
+        with memoryview(self._block.raw) as raw:
+            done = 0
+            while done < length:
+                done += os.pwrite(self.fd, raw[done:length], self._offset + done)
+        self._offset += self._fill
+        self._fill = 0
+    
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            if self.direct:
+                if self._fill:
+                    size = self._offset + self._fill
+                    self._flush(-(-self._fill // DIRECT_IO_ALIGNMENT) * DIRECT_IO_ALIGNMENT)
+                    os.ftruncate(self.fd, size)  # Trim the block padding
+            if self.durable:
+                os.fdatasync(self.fd) if hasattr(os, "fdatasync") else os.fsync(self.fd)
+            if not self.direct:
+                drop_page_cache(self.fd)  # Clean pages only: after a sync, all of them
+        finally:
+            os.close(self.fd)
+
+
+# Registered ("fixed") read buffers of each io_uring instance. The kernel pins
+# them once at setup instead of mapping the caller's buffer on every read.
+# Sized for metadata records and other small files; 8 x 64 KiB stays well
+# inside the default RLIMIT_MEMLOCK.
+FIXED_BUFFER_COUNT = 8
+FIXED_BUFFER_SIZE = 64 * 1024
+
+
+class BatchIO:
+
+    """
+    Reads and writes whole files in batches, via io_uring when available.
+    """
+
+    def __init__(self, queue_depth: int = 32):
+
+        """
+        Tries to set up an io_uring instance; falls back to POSIX on any failure.
+        """
+
+        self.queue_depth = queue_depth
+        self.backend = "posix"
+        self._liburing = None
+        self._ring = None
+        self._fixed = []  # Registered read buffers (empty: none registered)
+
+        try:
+            import liburing  # Optional dependency (Linux only)
+
+            ring = liburing.io_uring()
+            liburing.io_uring_queue_init(queue_depth, ring, 0)
+            self._liburing = liburing
+            self._ring = ring
+            self.backend = "io_uring"
+        except (ImportError, OSError):
+            # ImportError: binding not installed. OSError: kernel lacks io_uring (ENOSYS).
+            return
+
+        try:
+            fixed = [mmap.mmap(-1, FIXED_BUFFER_SIZE) for _ in range(FIXED_BUFFER_COUNT)]
+            liburing.io_uring_register_buffers(ring, liburing.iovec(fixed), len(fixed))
+            self._fixed = fixed
+        except (AttributeError, OSError, TypeError):
+            # Old binding, or RLIMIT_MEMLOCK too low: plain reads still work.
+            # (Files are not registered: BatchIO opens them for one batch only,
+            # so registering them would cost as many syscalls as it saves.)
+            pass
+
+    def close(self) -> None:
+
+        """
+        Releases the submission/completion rings.
+        """
+
+        if self._ring is not None:
+            self._liburing.io_uring_queue_exit(self._ring)  # Also unregisters the buffers
+            self._ring = None
+            self.backend = "posix"
+            self._fixed = []
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+
+    def read_files(self, paths: Sequence[str]) -> List[bytes]:
+
+        """
+        Returns the full contents of every path, in the same order.
+        """
+
+        if self._ring is None:
+            results = []
+            for path in paths:
+                with open(path, "rb") as f:
+                    results.append(f.read())
+            return results
+
+        fds, buffers, fixed = [], [], []
+        try:
+            # Opened one by one: a missing path closes the ones already open
+            for path in paths:
+                fds.append(os.open(path, os.O_RDONLY))
+            # Small files go into the registered buffers (one each, while they
+            # last), the rest into buffers of their own
+            for fd in fds:
+                size = os.fstat(fd).st_size
+                index = len(fixed) - fixed.count(None)  # Registered buffers handed out so far
+                if size <= FIXED_BUFFER_SIZE and index < len(self._fixed):
+                    buffers.append(memoryview(self._fixed[index])[:size])
+                    fixed.append(index)
+                else:
+                    buffers.append(bytearray(size))
+                    fixed.append(None)
+            self._run_batch("read", paths, fds, buffers, fixed)
+            return [bytes(b) for b in buffers]
+        finally:
+            for buffer in buffers:
+                if isinstance(buffer, memoryview):
+                    buffer.release()
+            for fd in fds:
+                os.close(fd)
+
+    def write_files(
+        self,
+        items: Sequence[Tuple[str, Union[bytes, AlignedBuffer]]],
+        direct_paths: Container[str] = (),
+        sync: bool = False,
+    ) -> None:
+
+        """
+        Replaces the contents of every path with the given bytes.
+
+        Paths listed in `direct_paths` are written with O_DIRECT (bypassing the
+        page cache) where the platform and filesystem allow it.
+
+        With `sync=True` every file is fdatasync'ed before returning, so the
+        whole batch (e.g. a product's data + metadata) is durable together.
+        Under io_uring the syncs for all files go out in one submission.
+        """
+
+        paths = [path for path, _ in items]
+        fds, buffers, sizes, directs = [], [], [], []
+        try:
+            for path, data in items:
+                fd, direct = _open_for_write(path, path in direct_paths)
+                fds.append(fd)
+                directs.append(direct)
+                sizes.append(len(data))
+                if isinstance(data, AlignedBuffer):
+                    # Already aligned: use it as-is (padding included for O_DIRECT)
+                    buffers.append(data.raw if direct else data.view)
+                else:
+                    buffers.append(_aligned_copy(data).raw if direct else data)
+
+            if self._ring is None:
+                for fd, buffer in zip(fds, buffers):
+                    self._complete_posix("write", fd, buffer, 0)
+            else:
+                self._run_batch("write", paths, fds, buffers)
+
+            # O_DIRECT wrote whole blocks: trim the padding back off
+            for fd, size, direct in zip(fds, sizes, directs):
+                if direct:
+                    os.ftruncate(fd, size)
+
+            # Durability: flush file data (and the size), but not timestamps
+            if sync:
+                if self._ring is None:
+                    for fd in fds:
+                        os.fdatasync(fd)
+                else:
+                    self._run_batch("fsync", paths, fds, [None] * len(fds))
+        finally:
+            for fd in fds:
+                os.close(fd)
+
+    # ------------------------------------------------------------------
+    # io_uring internals
+    # ------------------------------------------------------------------
+
+    def _run_batch(self, op, paths, fds, buffers, fixed=None) -> None:
+
+        """
+        Queues one SQE per file, submits them together and reaps all completions.
+        `fixed` gives, per file, the index of the registered buffer it reads
+        into (None: an ordinary buffer).
+
+        Every completion of a group is reaped before its first error is raised:
+        the kernel may still be using the other files and buffers, which the
+        caller releases as soon as the error reaches it, and a completion left
+        in the ring would be taken for one of the next batch's.
+        """
+
+        lib = self._liburing
+        for start in range(0, len(fds), self.queue_depth):
+            group = range(start, min(start + self.queue_depth, len(fds)))
+            for i in group:
+                sqe = lib.io_uring_get_sqe(self._ring)
+                if op == "read" and fixed and fixed[i] is not None:
+                    lib.io_uring_prep_read_fixed(sqe, fds[i], buffers[i], len(buffers[i]), 0, fixed[i])
+                elif op == "read":
+                    lib.io_uring_prep_read(sqe, fds[i], buffers[i], len(buffers[i]), 0)
+                elif op == "write":
+                    lib.io_uring_prep_write(sqe, fds[i], buffers[i], len(buffers[i]), 0)
+                else:
+                    lib.io_uring_prep_fsync(sqe, fds[i], lib.IORING_FSYNC_DATASYNC)
+                sqe.user_data = i
+            lib.io_uring_submit(self._ring)
+
+            cqe = lib.io_uring_cqe()
+            error, short = None, []
+            for _ in group:
+                lib.io_uring_wait_cqe(self._ring, cqe)
+                res, i = cqe.res, cqe.user_data
+                lib.io_uring_cqe_seen(self._ring, cqe)
+                if res < 0:
+                    error = error or OSError(-res, os.strerror(-res), paths[i])
+                elif buffers[i] is not None and res < len(buffers[i]):
+                    short.append((i, res))
+            if error is not None:
+                raise error
+            for i, res in short:
+                # Short transfer: finish the remainder synchronously
+                self._complete_posix(op, fds[i], buffers[i], res)
+
+    @staticmethod
+    def _complete_posix(op, fd, buffer, offset) -> None:
+        view = memoryview(buffer)
+        while offset < len(buffer):
+            if op == "read":
+                chunk = os.pread(fd, len(buffer) - offset, offset)
+                if not chunk:
+                    raise EOFError("File shrank while being read")
+                view[offset:offset + len(chunk)] = chunk
+                offset += len(chunk)
+            else:
+                offset += os.pwrite(fd, view[offset:], offset)
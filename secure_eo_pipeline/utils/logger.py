@@ -1,4 +1,9 @@
+import atexit  # For draining the audit queue on exit
+import functools  # For the audit log singleton
 import logging  # For audit trail
+import logging.handlers  # For the buffered console handler and the audit queue
+import os  # For fork handling
+import queue  # For the audit queue
 import sys  # For stdout
 
 from secure_eo_pipeline import config
@@ -17,6 +22,13 @@ from secure_eo_pipeline.db import sqlite_adapter
 # 3. Non-repudiation: A user cannot deny an action if it is securely logged.
 # =============================================================================
 
+# Records buffered by the console handler when stdout is not a terminal
+CONSOLE_BUFFER_RECORDS = 256
+
+# Queue listeners of the configured loggers, by logger name (see setup_logger)
+_LISTENERS = {}
+
+
 class SQLiteLogHandler(logging.Handler):
     
     """
@@ -42,6 +54,27 @@ class SQLiteLogHandler(logging.Handler):
             pass
 
 
+class _StdoutHandler(logging.StreamHandler):
+    
+    """
+    Console handler bound to sys.stdout as it is when each record is written,
+    not when the logger was set up. Records still buffered or queued at exit
+    then reach the real stdout even if the original one was swapped out and
+    closed meanwhile (e.g. by a test runner's output capture).
+    """
+    
+    def __init__(self):
+        super().__init__(sys.stdout)
+    
+    @property
+    def stream(self):
+        return sys.stdout
+    
+    @stream.setter
+    def stream(self, value):
+        pass  # Always follows sys.stdout
+
+
 def setup_logger(name="EO_Pipeline", log_file="audit.log"):
     
     """
@@ -64,39 +97,159 @@ def setup_logger(name="EO_Pipeline", log_file="audit.log"):
     # low-level DEBUG noise that would clutter the audit trail.
     logger.setLevel(logging.INFO)
     
-    # Create the Log Formatting structure.
-    # [TIMESTAMP]: When did it happen? (ISO 8601 format)
-    # [NAME]: Which system component reported it?
-    # [LEVEL]: How serious is it? (INFO, WARNING, ERROR)
-    # [MESSAGE]: What actually happened?
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # The audit logger owns its handlers: records are not handed on to the root
+    # logger's (usually empty) handler chain, and an application that configures
+    # the root logger does not get every audit event twice.
+    logger.propagate = False
     
     # CRITICAL CHECK: Does the logger already have handlers?
     # This prevents the common bug where logs are printed twice or three times
     # if this setup function is called multiple times during the lifecycle.
-    if not logger.handlers:
+    # (With propagation off, hasHandlers() only sees this logger's own handlers.)
+    if not logger.hasHandlers():
+        # Create the Log Formatting structure.
+        # [TIMESTAMP]: When did it happen? (ISO 8601 format)
+        # [NAME]: Which system component reported it?
+        # [LEVEL]: How serious is it? (INFO, WARNING, ERROR)
+        # [MESSAGE]: What actually happened?
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        handlers = []
+
         # 1. CONSOLE HANDLER (Standard Output)
-        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler = _StdoutHandler()
         console_handler.setFormatter(formatter)
-        logger.addHandler(console_handler)
+        # When stdout is a pipe or file (batch sweeps, services), every record
+        # would be its own write(). Records are collected and written in batches
+        # instead; ERROR and above flush at once, and logging's exit hook flushes
+        # the rest. An interactive terminal keeps seeing each event as it happens.
+        if not sys.stdout.isatty():
+            console_handler = logging.handlers.MemoryHandler(
+                CONSOLE_BUFFER_RECORDS, flushLevel=logging.ERROR, target=console_handler
+            )
+        handlers.append(console_handler)
         
         # 2. FILE HANDLER (Persistent Audit Trail)
         # Security Requirement: Logs must survive system restarts.
-        file_handler = logging.FileHandler(log_file)
+        # delay=True: the file is opened by the first record, so importing the
+        # package (e.g. only to generate a key) does not create audit.log
+        file_handler = logging.FileHandler(log_file, delay=True)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        handlers.append(file_handler)
 
         # 3. OPTIONAL SQLITE HANDLER (Structured Security Telemetry)
         # When enabled, every audit event is also mirrored into the SQLite DB.
         if getattr(config, "USE_SQLITE", False):
             sqlite_handler = SQLiteLogHandler()
             sqlite_handler.setFormatter(formatter)
-            logger.addHandler(sqlite_handler)
+            handlers.append(sqlite_handler)
+        
+        # 4. AUDIT QUEUE
+        # The logging call itself only enqueues the record; a listener thread
+        # does the console, file and database writes (the SQLite mirror is a
+        # transaction per event). Unlike a write-behind buffer, nothing waits in
+        # memory for a batch to fill: each record reaches audit.log as soon as
+        # the listener takes it, and flush_audit_log() waits for the backlog.
+        records = queue.Queue()
+        listener = logging.handlers.QueueListener(records, *handlers, respect_handler_level=True)
+        listener.start()
+        _LISTENERS[name] = listener
+        logger.addHandler(logging.handlers.QueueHandler(records))
         
     # Return the fully configured logger object to the caller
     return logger
 
+def flush_audit_log() -> None:
+    
+    """
+    Blocks until every queued audit record has been written by its handlers
+    (e.g. before the IDS reads audit.log or the audit table).
+    """
+    
+    for listener in list(_LISTENERS.values()):
+        listener.queue.join()
+        for handler in listener.handlers:
+            handler.flush()
+
+
+def _stop_listeners() -> None:
+    
+    """
+    Writes out the remaining queued records, stops the listener threads and
+    closes their handlers. Registered after logging's own exit hook, so it runs
+    first: the handlers are referenced only by their listener, and the
+    buffered console handler would otherwise be dropped with its records unwritten.
+    """
+    
+    for listener in list(_LISTENERS.values()):
+        listener.stop()
+        for handler in listener.handlers:
+            handler.flush()
+            handler.close()
+    _LISTENERS.clear()
+
+
+def _pause_listeners() -> None:
+    
+    """
+    Before fork(): drains the queues and stops the listener threads, so no
+    handler (or its file object's lock) is in the middle of a write when the
+    process is copied. The parent restarts them right after.
+    """
+    
+    for listener in _LISTENERS.values():
+        if listener._thread is not None:
+            listener.stop()
+
+
+def _resume_listeners() -> None:
+    for listener in _LISTENERS.values():
+        listener.start()
+
+
+def _log_directly_after_fork() -> None:
+    
+    """
+    In a forked child (batch-archiving workers) the listener thread does not
+    exist, and multiprocessing workers leave through os._exit() without running
+    exit hooks. The child's loggers therefore write synchronously to the same
+    handlers instead of queueing records nobody would write.
+    
+    Records the parent's console buffer held at fork time are the parent's to
+    write: the child's copy of that buffer is discarded, not written twice.
+    """
+    
+    for name, listener in list(_LISTENERS.items()):
+        logger = logging.getLogger(name)
+        for handler in list(logger.handlers):
+            if isinstance(handler, logging.handlers.QueueHandler):
+                logger.removeHandler(handler)
+        for handler in listener.handlers:
+            if isinstance(handler, logging.handlers.MemoryHandler):
+                handler.buffer.clear()
+            logger.addHandler(handler)
+    _LISTENERS.clear()
+
+
+atexit.register(_stop_listeners)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(
+        before=_pause_listeners,
+        after_in_parent=_resume_listeners,
+        after_in_child=_log_directly_after_fork,
+    )
+
+@functools.cache
+def get_audit_log() -> logging.Logger:
+    
+    """
+    Returns the pipeline's audit logger, configuring it on first use.
+    """
+    
+    return setup_logger()
+
+
 # Create a GLOBAL SINGLETON instance of the audit log.
 # This allows any module in the project to simply import 'audit_log' and use it.
 # It ensures all parts of the pipeline speak in a consistent format.
-audit_log = setup_logger()  # Creates the global `audit_log` instance
+# Setting it up does no file I/O (see the file handler above).
+audit_log = get_audit_log()  # Creates the global `audit_log` instance
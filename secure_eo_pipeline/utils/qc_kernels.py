@@ -0,0 +1,205 @@
+from typing import Optional
+
+import numpy as np  # For array operations
+
+# =============================================================================
+# Quality Control Kernels
+# =============================================================================
+# PURPOSE:
+# Radiometric calibration needs three things from every pixel:
+# 1. Is it NaN? (sensor failure -> reject the whole product)
+# 2. What is the maximum value? (decides whether float data must be rescaled)
+# 3. The scaled and clamped output value.
+#
+# DESIGN RATIONALE:
+# Done with separate NumPy calls (isnan().any(), nanmax(), divide, clip), the
+# array is streamed through memory 3-4 times. These kernels do the checks in
+# one early-exit pass and the scale+clamp in a second fused pass.
+# When the optional 'numba' package is installed, the loops are JIT-compiled
+# (the scale+clamp loop in parallel); otherwise equivalent NumPy code runs.
+# =============================================================================
+
+try:
+    from numba import njit, prange  # Optional JIT compiler
+    HAVE_NUMBA = True
+except ImportError:
+    HAVE_NUMBA = False
+
+# Raw 8-bit digital numbers (0-255) are divided by this to get reflectance (0.0-1.0).
+# A true division, as in the original chain: multiplying by 1/255 instead rounds
+# differently for most values and would change every processed hash.
+DN_MAX = 255.0
+
+# uint8 fast path: the calibrated value of every possible DN, computed exactly
+# like the generic path (255 * 4 bytes = 1 KiB, stays in L1).
+_U8_LUT = np.arange(256, dtype=np.float32) / np.float32(DN_MAX)
+
+# Elements examined per step by the NumPy NaN/max scan. Bounds the temporary mask
+# to a cache-sized block, lets the max reuse the block while it is still in
+# cache, and lets the scan stop early on an infected block.
+NAN_SCAN_BLOCK = 1 << 16
+
+# IEEE-754 NaN test on the raw bits: with the sign bit cleared, a NaN is any
+# pattern strictly greater than +inf (all-ones exponent, non-zero mantissa).
+# itemsize -> (mask clearing the sign bit, bit pattern of +inf)
+_NAN_BITS = {
+    4: (0x7FFFFFFF, 0x7F800000),
+    8: (0x7FFFFFFFFFFFFFFF, 0x7FF0000000000000),
+}
+
+
+def _scan_nan_max_blocks(flat: np.ndarray):
+
+    """
+    Block-wise NaN detection (on the integer view of the floats) fused with the max.
+
+    Both reductions run on the same cache-resident block before moving on, so
+    main memory is streamed once instead of once for isnan() and once for max().
+    """
+
+    spec = _NAN_BITS.get(flat.dtype.itemsize)
+    if spec is None:
+        # float16 / longdouble: no fixed-width integer view, use NumPy directly
+        if np.isnan(flat).any():
+            return True, -np.inf
+        return False, float(flat.max()) if flat.size else -np.inf
+
+    abs_mask, inf_bits = spec
+    # Same byte order and width, unsigned integer kind (e.g. '<f4' -> '<u4')
+    bits = flat.view(flat.dtype.str.replace("f", "u"))
+    max_val = -np.inf
+    for start in range(0, bits.size, NAN_SCAN_BLOCK):
+        stop = start + NAN_SCAN_BLOCK
+        if ((bits[start:stop] & abs_mask) > inf_bits).any():
+            return True, max_val
+        max_val = max(max_val, float(flat[start:stop].max()))
+    return False, max_val
+
+
+if HAVE_NUMBA:
+
+    @njit(cache=True)
+    def _scan_nan_max(flat):
+        # Sequential on purpose: the loop must stop at the first NaN.
+        max_val = -np.inf
+        for i in range(flat.size):
+            v = flat[i]
+            if v != v:  # Only NaN is not equal to itself
+                return True, max_val
+            if v > max_val:
+                max_val = v
+        return False, max_val
+
+    @njit(parallel=True, cache=True)
+    def _divide_clip_float(flat, divisor, out):
+        # `divisor` has the dtype of `flat`: divided in the data's own precision
+        for i in prange(flat.size):
+            v = flat[i] / divisor
+            out[i] = min(1.0, max(0.0, v))
+
+    @njit(parallel=True, cache=True)
+    def _divide_clip_int(flat, out):
+        # Converted to float32 first, then divided in float32
+        for i in prange(flat.size):
+            v = np.float32(flat[i]) / np.float32(DN_MAX)
+            out[i] = min(np.float32(1.0), max(np.float32(0.0), v))
+
+    def _scale_clip(flat, divisor, out):
+        if flat.dtype.kind in ("i", "u"):
+            _divide_clip_int(flat, out)
+        else:
+            _divide_clip_float(flat, flat.dtype.type(divisor), out)
+
+    @njit(parallel=True, cache=True)
+    def _lut_gather(flat, lut, out):
+        for i in prange(flat.size):
+            out[i] = lut[flat[i]]
+
+    def _calibrate_u8(flat, out):
+        _lut_gather(flat, _U8_LUT, out)
+
+else:
+
+    def _scan_nan_max(flat):
+        return _scan_nan_max_blocks(flat)
+
+    def _scale_clip(flat, divisor, out):
+        if flat.dtype.kind in ("i", "u"):
+            # Converted to float32 first, then divided in float32
+            np.divide(flat, np.float32(divisor), out=out, dtype=np.float32, casting="unsafe")
+        else:
+            # Divided in the data's own precision
+            np.divide(flat, divisor, out=out)
+        np.clip(out, 0.0, 1.0, out=out)
+
+    def _calibrate_u8(flat, out):
+        # A float32 division is correctly rounded, so it matches _U8_LUT exactly,
+        # and in NumPy it streams faster than a gather (np.take) through the table.
+        np.divide(flat, np.float32(255.0), out=out, dtype=np.float32)
+
+
+def calibrated_dtype(dtype) -> np.dtype:
+
+    """
+    Returns the dtype calibrate() produces for input of the given dtype.
+    """
+
+    dtype = np.dtype(dtype)
+    return np.dtype(np.float32) if dtype.kind in ("i", "u") else dtype
+
+
+def calibrate(data: np.ndarray, out: Optional[np.ndarray] = None) -> Optional[np.ndarray]:
+
+    """
+    Runs QC and radiometric calibration over an EO raster.
+
+    ARGUMENTS:
+        data (np.ndarray): the raw raster.
+        out (np.ndarray, optional): destination with the same shape, memory
+            layout and calibrated_dtype(data.dtype). Lets the caller compute
+            straight into a file buffer; allocated here when omitted.
+
+    RETURNS:
+        np.ndarray: calibrated reflectance in [0, 1], or None if any pixel is NaN.
+
+    RULES (unchanged from the original processing chain, bit for bit):
+    - Integer data (DNs 0-255) is converted to float32 and divided by 255.
+    - Float data is divided by 255 only if its maximum exceeds 1.0.
+    - The result is always clamped to [0, 1].
+    """
+
+    if out is None:
+        out = np.empty_like(data, dtype=calibrated_dtype(data.dtype))
+    elif out.shape != data.shape or out.dtype != calibrated_dtype(data.dtype):
+        raise ValueError("Output buffer does not match the input shape/dtype.")
+
+    # Both are flattened in the same explicit element order (that of `data`), so
+    # flat_out[i] is always the output element of flat[i]. ("K" would follow each
+    # array's own layout and pair up different elements of a C and an F array.)
+    order = "F" if data.flags.f_contiguous and not data.flags.c_contiguous else "C"
+    flat = np.ravel(data, order=order)
+    flat_out = np.ravel(out, order=order)
+    if not np.shares_memory(flat_out, out):
+        # ravel() had to copy: `out` is not contiguous in that order, and
+        # results would never reach it
+        raise ValueError("Output buffer must be contiguous, in the memory layout of the input.")
+
+    if data.dtype == np.uint8:
+        # Fast path for raw 8-bit DNs (the common case): no NaN is possible and
+        # 0..255 / 255 is already inside [0, 1], so neither scan nor clamp is needed
+        _calibrate_u8(flat, flat_out)
+        return out
+
+    if data.dtype.kind in ("i", "u"):
+        # Integers cannot hold NaN, so no scan is needed
+        _scale_clip(flat, DN_MAX, flat_out)
+        return out
+
+    has_nan, max_val = _scan_nan_max(flat)
+    if has_nan:
+        return None
+
+    # Dividing by 1.0 is exact: data already in range is only clamped
+    divisor = DN_MAX if max_val > 1.0 else 1.0
+    _scale_clip(flat, divisor, flat_out)
+    return out
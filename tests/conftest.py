@@ -0,0 +1,64 @@
+import errno
+import os
+import sys
+import types
+
+import pytest
+
+
+@pytest.fixture
+def fake_liburing(monkeypatch):
+    # Installs a minimal stand-in for the liburing binding: each SQE is completed
+    # at submit time with pread()/pwrite()/fdatasync(), or with -EIO for the fds
+    # in `failing`. Reads into registered buffers are recorded in `fixed_reads`.
+    def install(fixed_reads=None, failing=()):
+        def submit(ring):
+            for sqe in ring.pending:
+                op, fd, buf, nbytes, offset, index = sqe.args
+                if fd in failing:
+                    ring.done.append((-errno.EIO, sqe.user_data))
+                    continue
+                if op == "read":
+                    if index is not None:
+                        assert buf.obj is ring.registered[index]
+                        if fixed_reads is not None:
+                            fixed_reads.append(index)
+                    data = os.pread(fd, nbytes, offset)
+                    buf[:len(data)] = data
+                    res = len(data)
+                elif op == "write":
+                    res = os.pwrite(fd, memoryview(buf)[:nbytes], offset)
+                else:
+                    os.fdatasync(fd)
+                    res = 0
+                ring.done.append((res, sqe.user_data))
+            ring.pending.clear()
+
+        def wait_cqe(ring, cqe):
+            cqe.res, cqe.user_data = ring.done.pop(0)
+
+        def get_sqe(ring):
+            ring.pending.append(types.SimpleNamespace())
+            return ring.pending[-1]
+
+        fake = types.SimpleNamespace(
+            IORING_FSYNC_DATASYNC=1,
+            io_uring=lambda: types.SimpleNamespace(pending=[], done=[]),
+            io_uring_queue_init=lambda depth, ring, flags: None,
+            io_uring_queue_exit=lambda ring: None,
+            iovec=list,
+            io_uring_register_buffers=lambda ring, iovecs, count: setattr(ring, "registered", iovecs),
+            io_uring_get_sqe=get_sqe,
+            io_uring_prep_read=lambda sqe, fd, buf, n, off: setattr(sqe, "args", ("read", fd, buf, n, off, None)),
+            io_uring_prep_read_fixed=lambda sqe, fd, buf, n, off, i: setattr(sqe, "args", ("read", fd, buf, n, off, i)),
+            io_uring_prep_write=lambda sqe, fd, buf, n, off: setattr(sqe, "args", ("write", fd, buf, n, off, None)),
+            io_uring_prep_fsync=lambda sqe, fd, flags: setattr(sqe, "args", ("fsync", fd, None, 0, 0, None)),
+            io_uring_submit=submit,
+            io_uring_cqe=types.SimpleNamespace,
+            io_uring_wait_cqe=wait_cqe,
+            io_uring_cqe_seen=lambda ring, cqe: None,
+        )
+        monkeypatch.setitem(sys.modules, "liburing", fake)
+        return fake
+
+    return install
@@ -0,0 +1,42 @@
+import pytest
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.components.access_control import AccessController
+
+
+@pytest.fixture
+def controller(monkeypatch):
+    # Use the in-memory USERS_DB so tests do not depend on the SQLite file
+    monkeypatch.setattr(config, "USE_SQLITE", False)
+    return AccessController()
+
+
+def test_session_token_authorizes_by_role(controller):
+    role, token = controller.authenticate_session("analyst", "analyst123")
+    assert role == "analyst"
+
+    assert controller.authorize_token(token, "process") is True
+    assert controller.authorize_token(token, "manage_keys") is False
+
+
+def test_session_token_rejects_forgery_and_expiry(controller, monkeypatch):
+    _, token = controller.authenticate_session("user", "user123")
+
+    # Flipping a character breaks the HMAC
+    forged = ("A" if token[0] != "A" else "B") + token[1:]
+    assert controller.authorize_token(forged, "read") is False
+    assert controller.authorize_token(None, "read") is False
+
+    # Tokens issued with a non-positive TTL are already expired
+    monkeypatch.setattr(config, "SESSION_TTL_SECONDS", 0)
+    _, expired = controller.authenticate_session("user", "user123")
+    assert controller.authorize_token(expired, "read") is False
+
+
+def test_session_token_revoked_on_role_change(controller, monkeypatch):
+    monkeypatch.setitem(config.USERS_DB, "analyst", dict(config.USERS_DB["analyst"]))
+    _, token = controller.authenticate_session("analyst", "analyst123")
+
+    controller.update_role("analyst", "user")
+
+    assert controller.authorize_token(token, "read") is False
@@ -0,0 +1,353 @@
+import os
+import threading
+
+import pytest
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.resilience import backup_system
+from secure_eo_pipeline.resilience.backup_system import ResilienceManager
+from secure_eo_pipeline.utils import security
+
+
+@pytest.fixture
+def zones(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "ARCHIVE_DIR", str(tmp_path / "archive"))
+    monkeypatch.setattr(config, "BACKUP_DIR", str(tmp_path / "backup"))
+    (tmp_path / "archive").mkdir()
+    return tmp_path
+
+
+def _archive(zones, product_id, payload):
+    path = zones / "archive" / f"{product_id}.enc"
+    path.write_bytes(payload)
+    return path
+
+
+def test_overlapped_hash_matches_reference(tmp_path):
+    source = tmp_path / "big.enc"
+    source.write_bytes(os.urandom(5 * backup_system.PIPELINE_CHUNK_SIZE + 321))
+
+    assert backup_system._hash_overlapped(str(source)) == security.calculate_hash(str(source))
+
+
+@pytest.mark.parametrize("size", [0, 1, backup_system.PIPELINE_CHUNK_SIZE + 7])
+def test_mapped_hash_matches_reference(tmp_path, size):
+    source = tmp_path / "p.enc"
+    source.write_bytes(os.urandom(size))
+    assert backup_system._hash_mapped(str(source)) == security.calculate_hash(str(source))
+
+
+def test_verify_and_restore_heals_from_backup(zones):
+    payload = os.urandom(3 * backup_system.PIPELINE_CHUNK_SIZE)
+    primary = _archive(zones, "heal_1", payload)
+    good_hash = security.calculate_hash(str(primary))
+    manager = ResilienceManager()
+    assert manager.create_backup("heal_1") is True
+
+    primary.write_bytes(b"ransomware" + payload[10:])
+    assert manager.verify_and_restore("heal_1", lambda _: good_hash) is True
+    assert primary.read_bytes() == payload
+
+    # Truncated primary: no block-level repair possible, full in-kernel restore
+    primary.write_bytes(payload[:1000])
+    assert manager.verify_and_restore("heal_1", lambda _: good_hash) is True
+    assert primary.read_bytes() == payload
+
+
+def test_hasher_factory_is_swappable(tmp_path, monkeypatch):
+    import hashlib
+
+    used = []
+    monkeypatch.setattr(backup_system, "_HASHER_FACTORY", lambda: used.append(1) or hashlib.sha256())
+    source = tmp_path / "p.enc"
+    source.write_bytes(b"abc")
+    assert backup_system._hash_overlapped(str(source)) == hashlib.sha256(b"abc").hexdigest()
+    assert used == [1]
+
+
+def test_merkle_repair_rewrites_only_damaged_block(zones, monkeypatch):
+    block = backup_system.MERKLE_BLOCK_SIZE
+    payload = os.urandom(4 * block + 100)
+    primary = _archive(zones, "rot_1", payload)
+    good_hash = security.calculate_hash(str(primary))
+    manager = ResilienceManager()
+    manager.create_backup("rot_1")
+    assert (zones / "backup" / "rot_1.mht").exists()
+
+    # Single bit flip in block 2 (bit-rot)
+    damaged = bytearray(payload)
+    damaged[2 * block + 7] ^= 0x10
+    primary.write_bytes(bytes(damaged))
+
+    full_copies = []
+    monkeypatch.setattr(backup_system.fileops, "copy_file", lambda *a: full_copies.append(a))
+    assert manager.verify_and_restore("rot_1", lambda _: good_hash) is True
+    assert primary.read_bytes() == payload
+    assert full_copies == []
+
+
+def test_verdict_cache_skips_rehash_until_file_changes(zones, monkeypatch):
+    primary = _archive(zones, "hot_1", os.urandom(4096))
+    good_hash = security.calculate_hash(str(primary))
+    manager = ResilienceManager()
+
+    hashed = []
+    real_hash = backup_system._hash_mapped
+    monkeypatch.setattr(backup_system, "_hash_mapped", lambda p: hashed.append(p) or real_hash(p))
+
+    assert manager.verify_and_restore("hot_1", lambda _: good_hash) is True
+    assert manager.verify_and_restore("hot_1", lambda _: good_hash) is True
+    assert len(hashed) == 1
+
+    # A modified file (new size) is audited for real and reported
+    primary.write_bytes(b"tampered")
+    assert manager.verify_and_restore("hot_1", lambda _: good_hash) is False
+    assert len(hashed) == 2
+
+
+def test_bulk_backup_matches_single_backups(zones, monkeypatch):
+    payloads = {f"bulk_{i}": os.urandom(1000 + i) for i in range(5)}
+    for pid, payload in payloads.items():
+        _archive(zones, pid, payload)
+    manager = ResilienceManager()
+
+    # Posix fallback (no liburing here): one in-kernel copy per product
+    results = manager.create_backups_bulk(list(payloads) + ["bulk_missing"])
+    assert results == {**{pid: True for pid in payloads}, "bulk_missing": False}
+
+    # Batched path (forced; BatchIO still completes the I/O with POSIX calls)
+    class ForcedBatchIO(backup_system.BatchIO):
+        def __init__(self, queue_depth=32):
+            super().__init__(queue_depth)
+            self.backend = "io_uring"
+
+    monkeypatch.setattr(backup_system, "BatchIO", ForcedBatchIO)
+    monkeypatch.setattr(backup_system, "BULK_BACKUP_GROUP", 2)
+    for path in (zones / "backup").glob("bulk_*"):
+        path.unlink()
+    results = manager.create_backups_bulk(list(payloads) + ["bulk_missing"])
+    assert results == {**{pid: True for pid in payloads}, "bulk_missing": False}
+    for pid, payload in payloads.items():
+        assert (zones / "backup" / f"{pid}.enc").read_bytes() == payload
+        assert (zones / "backup" / f"{pid}.mht").exists()
+
+
+def test_bulk_backup_under_io_uring_links_into_the_store(zones, monkeypatch, fake_liburing):
+    fake_liburing()
+    monkeypatch.setattr(backup_system, "BULK_BACKUP_GROUP", 2)
+    payloads = {f"ring_{i}": os.urandom(1000 + i) for i in range(5)}
+    payloads["ring_dup"] = payloads["ring_0"]  # Same content: one blob
+    for pid, payload in payloads.items():
+        _archive(zones, pid, payload)
+    manager = ResilienceManager()
+
+    assert manager.create_backups_bulk(list(payloads)) == {pid: True for pid in payloads}
+    for pid, payload in payloads.items():
+        backup = zones / "backup" / f"{pid}.enc"
+        blob = zones / "backup" / "cas" / security.calculate_hash(str(backup))
+        assert backup.read_bytes() == payload
+        assert os.path.samestat(backup.stat(), blob.stat())  # A hard link into the store
+        assert (zones / "backup" / f"{pid}.mht").exists()
+        assert (zones / "archive" / f"{pid}.enc.stat").exists()
+    assert len(list((zones / "backup" / "cas").iterdir())) == 5
+    assert not list((zones / "backup").rglob("*.tmp"))
+
+    # A failed write leaves the previous backups in place
+    for pid in payloads:
+        _archive(zones, pid, os.urandom(2000))
+
+    def failing_write(self, items, direct_paths=(), sync=False):
+        raise OSError("disk full")
+    monkeypatch.setattr(backup_system.BatchIO, "write_files", failing_write)
+    with pytest.raises(OSError):
+        manager.create_backups_bulk(list(payloads))
+    for pid, payload in payloads.items():
+        assert (zones / "backup" / f"{pid}.enc").read_bytes() == payload
+    assert not list((zones / "backup").rglob("*.tmp"))
+
+
+def test_missing_files_are_reported_not_raised(zones):
+    manager = ResilienceManager()
+    assert manager.create_backup("ghost_1") is False
+
+    # Primary missing, backup present: restored
+    primary = _archive(zones, "ghost_2", b"payload")
+    good_hash = security.calculate_hash(str(primary))
+    manager.create_backup("ghost_2")
+    primary.unlink()
+    assert manager.verify_and_restore("ghost_2", lambda _: good_hash) is True
+    assert primary.read_bytes() == b"payload"
+
+    # Both missing: permanent loss
+    primary.unlink()
+    (zones / "backup" / "ghost_2.enc").unlink()
+    assert manager.verify_and_restore("ghost_2", lambda _: good_hash) is False
+
+
+def test_verify_and_restore_many_reports_each_product(zones):
+    manager = ResilienceManager()
+    hashes = {}
+    for i in range(6):
+        pid = f"sweep_{i}"
+        primary = _archive(zones, pid, os.urandom(50_000))
+        hashes[pid] = security.calculate_hash(str(primary))
+        manager.create_backup(pid)
+    (zones / "archive" / "sweep_2.enc").write_bytes(b"corrupted")
+    (zones / "archive" / "sweep_4.enc").write_bytes(b"corrupted")
+    (zones / "backup" / "sweep_4.enc").unlink()
+
+    verdicts = manager.verify_and_restore_many(list(hashes), hashes.get, max_workers=4)
+    assert verdicts == {pid: pid != "sweep_4" for pid in hashes}
+    assert security.calculate_hash(str(zones / "archive" / "sweep_2.enc")) == hashes["sweep_2"]
+
+
+def test_audit_hash_algorithm_selection(zones, monkeypatch):
+    primary = _archive(zones, "algo_1", os.urandom(10_000))
+    sha = security.calculate_hash(str(primary))
+    assert backup_system.audit_hash(str(primary), "sha256") == sha
+
+    # BLAKE3 requested without the package: SHA-256, recognizable by the missing tag
+    monkeypatch.setattr(backup_system, "HAVE_BLAKE3", False)
+    monkeypatch.setattr(config, "INTEGRITY_HASH_ALGO", "blake3")
+    assert backup_system.audit_hash(str(primary)) == sha
+
+    # ...and a BLAKE3 reference cannot be audited at all (no bogus "mismatch" restore)
+    with pytest.raises(RuntimeError):
+        ResilienceManager().verify_and_restore("algo_1", lambda _: backup_system.BLAKE3_TAG + "00")
+
+
+def test_tree_hash_references_heal_and_verify(zones, monkeypatch):
+    import hashlib
+
+    monkeypatch.setattr(security, "TREE_HASH_PART_SIZE", 4096)
+    payload = os.urandom(5 * 4096 + 100)
+    primary = _archive(zones, "tree_1", payload)
+    reference = backup_system.audit_hash(str(primary), "sha256-tree")
+    parts = b"".join(hashlib.sha256(payload[i:i + 4096]).digest() for i in range(0, len(payload), 4096))
+    assert reference == security.TREE_HASH_TAG + hashlib.sha256(parts).hexdigest()
+
+    manager = ResilienceManager()
+    manager.create_backup("tree_1")
+    primary.write_bytes(b"x" + payload[1:])
+    assert manager.verify_and_restore("tree_1", lambda _: reference) is True
+    assert primary.read_bytes() == payload
+
+
+def test_blake3_references_heal_and_verify(zones):
+    blake3 = pytest.importorskip("blake3")
+    payload = os.urandom(3 * backup_system.MERKLE_BLOCK_SIZE)
+    primary = _archive(zones, "b3_1", payload)
+    reference = backup_system.audit_hash(str(primary), "blake3")
+    assert reference == backup_system.BLAKE3_TAG + blake3.blake3(payload).hexdigest()
+
+    manager = ResilienceManager()
+    manager.create_backup("b3_1")
+    primary.write_bytes(b"x" + payload[1:])
+    assert manager.verify_and_restore("b3_1", lambda _: reference) is True
+    assert primary.read_bytes() == payload
+
+
+def test_identical_backups_share_one_blob(zones, monkeypatch):
+    payload = os.urandom(200_000)
+    primary = _archive(zones, "cas_1", payload)
+    manager = ResilienceManager()
+    assert manager.create_backup("cas_1") is True
+
+    # Same content again: linked, not copied
+    copies = []
+    real_copy = backup_system.fileops.copy_file
+    monkeypatch.setattr(backup_system.fileops, "copy_file", lambda *a, **k: copies.append(a) or real_copy(*a, **k))
+    _archive(zones, "cas_2", payload)
+    assert manager.create_backup("cas_2") is True
+    assert copies == []
+    first, second = zones / "backup" / "cas_1.enc", zones / "backup" / "cas_2.enc"
+    assert os.path.samefile(first, second) and second.read_bytes() == payload
+
+    # No callback: audits use the content hash recorded at backup time
+    primary.write_bytes(b"tampered" + payload[8:])
+    assert manager.verify_and_restore("cas_1") is True
+    assert primary.read_bytes() == payload
+
+    # New content for cas_2 leaves the shared blob (and cas_1's backup) intact
+    _archive(zones, "cas_2", b"reprocessed")
+    manager.create_backup("cas_2")
+    assert first.read_bytes() == payload and second.read_bytes() == b"reprocessed"
+    first.unlink()
+    assert manager.prune_backup_store() == 1
+    assert len(list((zones / "backup" / "cas").iterdir())) == 1
+
+
+
+def test_prune_spares_in_flight_blobs(zones, monkeypatch):
+    _archive(zones, "inflight", os.urandom(50_000))
+    manager = ResilienceManager()
+    staged = zones / "backup" / "cas" / ("0" * 64 + ".tmp")
+    staged.write_bytes(b"still being written")
+    assert manager.prune_backup_store() == 0
+    assert staged.exists()
+
+    # A prune racing a backup waits until the new blob is linked
+    pruner = []
+    real_link = manager._link_backup
+
+    def link_after_prune_starts(*args):
+        pruner.append(threading.Thread(target=manager.prune_backup_store))
+        pruner[0].start()
+        pruner[0].join(timeout=0.2)
+        real_link(*args)
+
+    monkeypatch.setattr(manager, "_link_backup", link_after_prune_starts)
+    assert manager.create_backup("inflight") is True
+    pruner[0].join()
+    backup = zones / "backup" / "inflight.enc"
+    assert os.stat(backup).st_nlink == 2
+    assert backup.read_bytes() == (zones / "archive" / "inflight.enc").read_bytes()
+
+
+def test_integrity_stamp_skips_hash_across_managers(zones, monkeypatch):
+    primary = _archive(zones, "stamp_1", os.urandom(8192))
+    good_hash = security.calculate_hash(str(primary))
+    ResilienceManager().create_backup("stamp_1")
+    assert (zones / "archive" / "stamp_1.enc.stat").exists()
+
+    hashed = []
+    real_hash = backup_system._hash_mapped
+    monkeypatch.setattr(backup_system, "_hash_mapped", lambda p: hashed.append(p) or real_hash(p))
+
+    # A new manager (empty verdict cache) trusts the stamp of the untouched file
+    assert ResilienceManager().verify_and_restore("stamp_1", lambda _: good_hash) is True
+    assert hashed == []
+
+    # Touched file: full audit, which renews the stamp
+    os.utime(primary, ns=(1, 1))
+    assert ResilienceManager().verify_and_restore("stamp_1", lambda _: good_hash) is True
+    assert len(hashed) == 1
+
+    # Expired stamp: rehashed (bit-rot leaves mtime alone)
+    monkeypatch.setattr(backup_system, "STAMP_TTL_SECONDS", 0.0)
+    assert ResilienceManager().verify_and_restore("stamp_1", lambda _: good_hash) is True
+    assert len(hashed) == 2
+
+
+def test_audit_after_key_rotation_restores_nothing(zones, monkeypatch):
+    monkeypatch.setattr(config, "KEY_PATH", str(zones / "secret.key"))
+    security.generate_key()
+    payloads = {f"rot_{i}": os.urandom(5000 + i) for i in range(3)}
+    for pid, data in payloads.items():
+        (zones / pid).write_bytes(data)
+        security.encrypt_file_to(str(zones / pid), str(zones / "archive" / f"{pid}.enc"), context=pid)
+    manager = ResilienceManager()
+    for pid in payloads:
+        assert manager.create_backup(pid) is True
+
+    assert manager.rotate_keys() is True
+
+    restored = []
+    monkeypatch.setattr(backup_system.fileops, "copy_file", lambda *a, **k: restored.append(a))
+    monkeypatch.setattr(backup_system, "_repair_blocks", lambda *a: restored.append(a))
+    for pid, data in payloads.items():
+        assert ResilienceManager().verify_and_restore(pid) is True
+        out = zones / f"{pid}.out"
+        security.decrypt_file_to(str(zones / "backup" / f"{pid}.enc"), str(out), context=pid)
+        assert out.read_bytes() == data
+    assert restored == []
@@ -0,0 +1,32 @@
+import json
+
+import numpy as np
+import pytest
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.db import catalog
+
+
+@pytest.fixture
+def catalog_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CATALOG_DB", str(tmp_path / "catalog.db"))
+    return tmp_path
+
+
+def test_records_round_trip_and_export(catalog_db):
+    catalog.upsert("p1", {"product_id": "p1", "timestamp": 2.0, "sensor": "S", "score": np.float32(0.5)})
+    catalog.upsert("p0", {"product_id": "p0", "timestamp": 1.0, "sensor": "S", "status": "ARCHIVED"})
+
+    assert catalog.get("p1")["score"] == 0.5
+    assert [m["product_id"] for m in catalog.search(sensor="S")] == ["p0", "p1"]
+
+    export = catalog_db / "catalog.json"
+    assert catalog.export_json(str(export)) == 2
+    assert json.loads(export.read_text())["p0"]["status"] == "ARCHIVED"
+
+
+def test_reads_json_records_whatever_the_codec(catalog_db):
+    conn = catalog.get_connection()
+    conn.execute("INSERT INTO products (id, meta_json) VALUES (?, ?)", ("legacy", b'{"product_id": "legacy"}'))
+    conn.commit()
+    assert catalog.get("legacy") == {"product_id": "legacy"}
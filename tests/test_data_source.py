@@ -0,0 +1,17 @@
+import json
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.components.data_source import EOSimulator
+
+
+def test_generate_products_batch_orders_timestamps(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "INGEST_DIR", str(tmp_path))
+    ids = [f"batch_{i}" for i in range(10)]
+
+    paths = EOSimulator().generate_products_batch(ids)
+
+    assert paths == [str(tmp_path / f"{pid}.npy") for pid in ids]
+    timestamps = [json.loads((tmp_path / f"{pid}.json").read_text())["timestamp"] for pid in ids]
+    # Distinct after the float conversion, and in generation order
+    assert len(set(timestamps)) == len(ids)
+    assert timestamps == sorted(timestamps)
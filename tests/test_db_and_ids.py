@@ -1,7 +1,10 @@
 import os
 
+import numpy as np
+
 from secure_eo_pipeline import config
 from secure_eo_pipeline.db import sqlite_adapter
+from secure_eo_pipeline.components import ids as ids_module
 from secure_eo_pipeline.components.ids import IntrusionDetectionSystem
 
 
@@ -63,3 +66,13 @@ def test_ids_ml_log_anomaly(tmp_path, monkeypatch):
     assert "Brute Force Attack" in types
     assert "ML Log Anomaly" in types
 
+
+
+def test_ids_brute_force_streak_semantics():
+    F, S, O = ids_module.SIG_FAILURE, ids_module.SIG_SUCCESS, ids_module.SIG_OTHER
+    sig_ids = np.array([F, O, F, F, F, F, F, S, F, F, O, F], dtype=np.int8)
+
+    positions = ids_module.brute_force_positions(sig_ids)
+
+    # Streak restarts after 3 failures and on SUCCESS; unrelated lines are ignored.
+    assert positions.tolist() == [3, 6, 11]
@@ -0,0 +1,54 @@
+import errno
+import os
+
+import pytest
+
+from secure_eo_pipeline.utils import fileops
+
+
+def test_copy_file_kernel_path_and_fallback(tmp_path, monkeypatch):
+    source = tmp_path / "product.npy"
+    payload = os.urandom(3 * 1024 * 1024 + 17)
+    source.write_bytes(payload)
+
+    fileops.copy_file(str(source), str(tmp_path / "copy1.npy"))
+    assert (tmp_path / "copy1.npy").read_bytes() == payload
+
+    # Filesystems that refuse copy_file_range fall back to shutil.copyfile
+    def refuse(*args):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(os, "copy_file_range", refuse, raising=False)
+    fileops.copy_file(str(source), str(tmp_path / "copy2.npy"))
+    assert (tmp_path / "copy2.npy").read_bytes() == payload
+
+
+@pytest.mark.skipif(fileops.fcntl is None, reason="FICLONE needs fcntl")
+def test_copy_file_prefers_reflink(tmp_path, monkeypatch):
+    source = tmp_path / "product.enc"
+    source.write_bytes(b"ciphertext" * 1000)
+
+    clones = []
+
+    def fake_ioctl(dst_fd, request, src_fd):
+        assert request == fileops.FICLONE
+        clones.append(request)
+        os.write(dst_fd, os.pread(src_fd, 1 << 20, 0))  # What a reflink looks like to readers
+
+    monkeypatch.setattr(fileops.fcntl, "ioctl", fake_ioctl)
+    monkeypatch.setattr(os, "copy_file_range", lambda *a: 0, raising=False)
+    fileops.copy_file(str(source), str(tmp_path / "clone.enc"))
+    assert clones and (tmp_path / "clone.enc").read_bytes() == source.read_bytes()
+
+
+def test_durable_copy_syncs_once(tmp_path, monkeypatch):
+    source = tmp_path / "product.enc"
+    source.write_bytes(os.urandom(2 * 1024 * 1024))
+
+    synced = []
+    real_fdatasync = os.fdatasync
+    monkeypatch.setattr(os, "fdatasync", lambda fd: synced.append(fd) or real_fdatasync(fd))
+    fileops.copy_file(str(source), str(tmp_path / "backup.enc"), durable=True)
+    fileops.copy_file(str(source), str(tmp_path / "scratch.enc"))
+    assert len(synced) == 1
+    assert (tmp_path / "backup.enc").read_bytes() == source.read_bytes()
@@ -2,37 +2,42 @@ import pytest
 import os
 import json
 import shutil
+import uuid
+import numpy as np
 from secure_eo_pipeline.components.ingestion import IngestionManager
+from secure_eo_pipeline.utils import security
 from secure_eo_pipeline import config
 
+# One synthetic 12-bit raster, generated once and saved by every test that needs it
+RASTER = np.random.default_rng(0).integers(0, 4096, size=(512, 512), dtype=np.uint16)
+
 @pytest.fixture
 def ingestion_manager():
     return IngestionManager()
 
+@pytest.fixture(scope="session")
+def ingest_root(tmp_path_factory):
+    # One temporary root for the whole session; each test gets its own subdirectory
+    return tmp_path_factory.mktemp("ingest")
+
 @pytest.fixture
-def setup_teardown_ingest(tmp_path):
+def setup_teardown_ingest(ingest_root, monkeypatch):
     # Setup: Create temp directories
-    base_dir = tmp_path / "simulation_data"
+    base_dir = ingest_root / uuid.uuid4().hex
     ingest_dir = base_dir / "ingest_landing_zone"
     processing_dir = base_dir / "processing_staging"
     
     os.makedirs(ingest_dir)
     os.makedirs(processing_dir)
     
-    # Override config paths for testing
-    original_ingest = config.INGEST_DIR
-    original_processing = config.PROCESSING_DIR
-    
-    config.INGEST_DIR = str(ingest_dir)
-    config.PROCESSING_DIR = str(processing_dir)
+    # Override config paths for testing (monkeypatch restores them, even on failure)
+    monkeypatch.setattr(config, "INGEST_DIR", str(ingest_dir))
+    monkeypatch.setattr(config, "PROCESSING_DIR", str(processing_dir))
     
     yield ingest_dir, processing_dir
     
-    # Teardown: Restore config
-    config.INGEST_DIR = original_ingest
-    config.PROCESSING_DIR = original_processing
-    if os.path.exists(base_dir):
-        shutil.rmtree(base_dir)
+    # Teardown: Remove the test's zones
+    shutil.rmtree(base_dir, ignore_errors=True)
 
 def test_ingest_product_success(ingestion_manager, setup_teardown_ingest):
     ingest_dir, processing_dir = setup_teardown_ingest
@@ -42,8 +47,7 @@ def test_ingest_product_success(ingestion_manager, setup_teardown_ingest):
     data_file = ingest_dir / f"{product_id}.npy"
     meta_file = ingest_dir / f"{product_id}.json"
     
-    with open(data_file, "wb") as f:
-        f.write(b"fake_satellite_data")
+    np.save(data_file, RASTER)  # A real .npy, as the processing stage will np.load() it
         
     metadata = {
         "product_id": product_id,
@@ -66,8 +70,9 @@ def test_ingest_product_success(ingestion_manager, setup_teardown_ingest):
     with open(processed_meta_path, "r") as f:
         new_meta = json.load(f)
     
-    assert "original_hash" in new_meta
+    assert new_meta["original_hash"] == security.calculate_hash(str(data_file))
     assert new_meta["status"] == "INGESTED"
+    np.testing.assert_array_equal(np.load(result_path), RASTER)
 
 def test_ingest_missing_files(ingestion_manager, setup_teardown_ingest):
     ingest_dir, _ = setup_teardown_ingest
@@ -101,3 +106,63 @@ def test_ingest_invalid_schema(ingestion_manager, setup_teardown_ingest):
         
     result = ingestion_manager.ingest_product(product_id)
     assert result is None
+
+def test_ingest_rejects_non_object_metadata(ingestion_manager, setup_teardown_ingest):
+    ingest_dir, _ = setup_teardown_ingest
+    product_id = "list_meta_product"
+    (ingest_dir / f"{product_id}.npy").write_bytes(b"data")
+    # Holds every mandatory name, but as a list rather than an object
+    (ingest_dir / f"{product_id}.json").write_text(json.dumps(["product_id", "timestamp", "sensor"]))
+
+    assert ingestion_manager.ingest_product(product_id) is None
+
+def test_ingest_products_uses_single_landing_scan(ingestion_manager, setup_teardown_ingest):
+    ingest_dir, _ = setup_teardown_ingest
+    metadata = {"timestamp": "2023-01-01", "sensor": "Sentinel-2"}
+
+    for product_id in ("batch_a", "batch_b"):
+        with open(ingest_dir / f"{product_id}.npy", "wb") as f:
+            f.write(b"data")
+        with open(ingest_dir / f"{product_id}.json", "w") as f:
+            json.dump(dict(metadata, product_id=product_id), f)
+    # Incomplete product: metadata only
+    with open(ingest_dir / "batch_c.json", "w") as f:
+        json.dump(dict(metadata, product_id="batch_c"), f)
+
+    scan = ingestion_manager._scan_landing_zone()
+    assert scan == {"batch_a": (True, True), "batch_b": (True, True), "batch_c": (False, True)}
+
+    results = ingestion_manager.ingest_products(["batch_a", "batch_c", "batch_b"])
+    assert [r is not None for r in results] == [True, False, True]
+
+
+def test_ingest_products_batches_metadata_reads(ingestion_manager, setup_teardown_ingest, monkeypatch):
+    from secure_eo_pipeline.components import ingestion
+
+    ingest_dir, _ = setup_teardown_ingest
+    metadata = {"timestamp": "2023-01-01", "sensor": "Sentinel-2"}
+    for product_id in ("ring_a", "ring_b", "ring_c"):
+        (ingest_dir / f"{product_id}.npy").write_bytes(b"data")
+        (ingest_dir / f"{product_id}.json").write_text(json.dumps(dict(metadata, product_id=product_id)))
+    (ingest_dir / "ring_d.npy").write_bytes(b"data")  # Incomplete: no metadata
+
+    # Batched path (forced; BatchIO still completes the I/O with POSIX calls)
+    batches = []
+
+    class ForcedBatchIO(ingestion.BatchIO):
+        def __init__(self, queue_depth=32):
+            super().__init__(queue_depth)
+            self.backend = "io_uring"
+
+        def read_files(self, paths):
+            batches.append(len(paths))
+            return super().read_files(paths)
+
+    monkeypatch.setattr(ingestion, "BatchIO", ForcedBatchIO)
+    monkeypatch.setattr(ingestion, "INGEST_READ_GROUP", 2)
+    results = ingestion_manager.ingest_products(["ring_a", "ring_b", "ring_d", "ring_c"])
+    assert [r is not None for r in results] == [True, True, False, True]
+    assert batches == [2, 1]
+    with open(results[1]) as f:
+        assert f.read() == "data"
+
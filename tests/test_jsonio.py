@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+import pytest
+
+from secure_eo_pipeline.utils import jsonio
+
+
+def test_metadata_round_trip_and_errors(tmp_path):
+    meta = {"product_id": "p1", "timestamp": 1.5, "sensor": "Sentinel-2", "tags": [1, 2]}
+    path = tmp_path / "meta.json"
+
+    jsonio.dump_file(meta, str(path))
+    assert jsonio.load_file(str(path)) == meta
+    # Files stay readable by the standard library
+    assert json.loads(path.read_text()) == meta
+
+    with pytest.raises(json.JSONDecodeError):
+        jsonio.loads(b"{not json")
+
+
+def test_ensure_dir_creates_once(tmp_path):
+    target = str(tmp_path / "a" / "b")
+
+    jsonio.ensure_dir(target)
+    jsonio.ensure_dir(target)  # Second call is a no-op
+    assert (tmp_path / "a" / "b").is_dir()
+
+
+def test_dumps_accepts_numpy_scalars(monkeypatch):
+    meta = {"ml_score": np.float32(0.5), "orbit": np.int64(1234)}
+    assert json.loads(jsonio.dumps(meta)) == {"ml_score": 0.5, "orbit": 1234}
+
+    # Same result through the standard-library fallback
+    monkeypatch.setattr(jsonio, "HAVE_ORJSON", False)
+    assert json.loads(jsonio.dumps(meta)) == {"ml_score": 0.5, "orbit": 1234}
+
+
+def test_ensure_dirs_creates_nested_set_once(tmp_path, monkeypatch):
+    root = tmp_path / "sim"
+    paths = [str(root / "a"), str(root / "a" / "b"), str(root / "c"), str(root / "a")]
+
+    made = []
+    real_makedirs = jsonio.os.makedirs
+
+    def counting_makedirs(path, **kwargs):
+        made.append(path)
+        with monkeypatch.context() as m:  # Parents created by the real call are not counted
+            m.setattr(jsonio.os, "makedirs", real_makedirs)
+            real_makedirs(path, **kwargs)
+
+    monkeypatch.setattr(jsonio.os, "makedirs", counting_makedirs)
+    jsonio.ensure_dirs(paths)
+    assert sorted(made) == [str(root / "a" / "b"), str(root / "c")]
+    assert (root / "a" / "b").is_dir() and (root / "c").is_dir()
+
+    jsonio.ensure_dirs(paths)  # Already created: no further syscalls
+    jsonio.ensure_dir(str(root / "a"))
+    assert len(made) == 2
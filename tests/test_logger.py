@@ -0,0 +1,80 @@
+import logging
+import logging.handlers
+import os
+import subprocess
+import sys
+
+import pytest
+
+from secure_eo_pipeline.utils import logger as logger_module
+
+
+def test_audit_records_are_queued_and_flushed(tmp_path):
+    log_file = tmp_path / "audit.log"
+    log = logger_module.setup_logger("EO_Test_Queue", str(log_file))
+    try:
+        assert not log_file.exists()  # Opened by the first record, not by setup
+
+        # Callers only enqueue; the listener owns the real handlers
+        assert [type(h) for h in log.handlers] == [logging.handlers.QueueHandler]
+
+        log.warning("[AUTH] FAILURE: Invalid password for '%s'.", "admin")
+        logger_module.flush_audit_log()
+        assert "Invalid password for 'admin'" in log_file.read_text()
+
+        # A second setup call does not attach a second queue
+        assert logger_module.setup_logger("EO_Test_Queue", str(log_file)) is log
+        assert len(log.handlers) == 1
+    finally:
+        listener = logger_module._LISTENERS.pop("EO_Test_Queue")
+        listener.stop()
+        for handler in listener.handlers:
+            handler.close()
+        log.handlers.clear()
+
+
+def test_get_audit_log_is_the_module_singleton():
+    assert logger_module.get_audit_log() is logger_module.audit_log
+    assert logger_module.audit_log.propagate is False
+
+
+def test_console_handler_follows_current_stdout(monkeypatch):
+    import io
+
+    handler = logger_module._StdoutHandler()
+    replacement = io.StringIO()
+    monkeypatch.setattr("sys.stdout", replacement)  # e.g. output capture swapped in after setup
+    handler.emit(logging.makeLogRecord({"msg": "[INGEST] queued record", "levelno": logging.INFO}))
+    assert "queued record" in replacement.getvalue()
+
+
+_PIPED_SCRIPT = """
+import os
+from secure_eo_pipeline import config
+config.USE_SQLITE = False
+from secure_eo_pipeline.utils.logger import audit_log
+audit_log.info("[INGEST] parent record one")
+audit_log.warning("[INGEST] parent record two")
+if FORK:
+    pid = os.fork()
+    if pid == 0:
+        audit_log.error("[INGEST] child record")  # Flushes the child's console buffer
+        os._exit(0)
+    os.waitpid(pid, 0)
+"""
+
+
+@pytest.mark.parametrize("fork", [False, True])
+def test_buffered_console_records_reach_piped_stdout(tmp_path, fork):
+    if fork and not hasattr(os, "fork"):
+        pytest.skip("no fork() on this platform")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=root)
+    script = f"FORK = {fork}\n" + _PIPED_SCRIPT
+    result = subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env,
+                            stdout=subprocess.PIPE, text=True, timeout=60, check=True)
+    lines = result.stdout.splitlines()
+    # Each parent record exactly once (not lost at exit, not repeated by the child)
+    assert sum("parent record one" in line for line in lines) == 1
+    assert sum("parent record two" in line for line in lines) == 1
+    assert sum("child record" in line for line in lines) == (1 if fork else 0)
@@ -0,0 +1,257 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.components.data_source import EOSimulator
+from secure_eo_pipeline.components.ingestion import IngestionManager
+from secure_eo_pipeline.components.processing import ProcessingEngine
+from secure_eo_pipeline.utils import qc_kernels, security
+
+
+@pytest.fixture
+def pipeline_dirs(tmp_path, monkeypatch):
+    ingest_dir = tmp_path / "ingest_landing_zone"
+    processing_dir = tmp_path / "processing_staging"
+    monkeypatch.setattr(config, "INGEST_DIR", str(ingest_dir))
+    monkeypatch.setattr(config, "PROCESSING_DIR", str(processing_dir))
+    return ingest_dir, processing_dir
+
+
+def test_process_product_success(pipeline_dirs):
+    _, processing_dir = pipeline_dirs
+    product_id = "proc_ok"
+
+    EOSimulator().generate_product(product_id)
+    assert IngestionManager().ingest_product(product_id) is not None
+
+    result = ProcessingEngine().process_product(product_id)
+    assert result is not None
+
+    with open(processing_dir / f"{product_id}.json") as f:
+        meta = json.load(f)
+    assert meta["status"] == "PROCESSED"
+    assert meta["original_checksum"].startswith(security.CHECKSUM_ALGORITHM)
+    # The recorded hash must match the bytes actually on disk
+    assert meta["processed_hash"] == security.calculate_hash(result)
+
+    data = np.load(result)
+    assert data.dtype == np.float32
+    assert data.min() >= 0.0 and data.max() <= 1.0
+
+
+def test_crash_before_data_rename_keeps_level0_record(pipeline_dirs, monkeypatch):
+    _, processing_dir = pipeline_dirs
+    product_id = "proc_crash"
+    EOSimulator().generate_product(product_id)
+    IngestionManager().ingest_product(product_id)
+    record = (processing_dir / f"{product_id}.json").read_bytes()
+
+    def crash(src, dst):
+        raise OSError("power lost")
+    monkeypatch.setattr(os, "replace", crash)
+    with pytest.raises(OSError):
+        ProcessingEngine().process_product(product_id)
+
+    # The record on disk still describes the Level-0 data next to it
+    assert (processing_dir / f"{product_id}.json").read_bytes() == record
+
+
+def test_process_product_rejects_nan(pipeline_dirs):
+    product_id = "proc_nan"
+
+    EOSimulator().generate_product(product_id, corrupted=True)
+    IngestionManager().ingest_product(product_id)
+
+    assert ProcessingEngine().process_product(product_id) is None
+
+
+def test_process_product_rejects_tampered_input(pipeline_dirs):
+    _, processing_dir = pipeline_dirs
+    product_id = "proc_tampered"
+
+    EOSimulator().generate_product(product_id)
+    IngestionManager().ingest_product(product_id)
+    with open(processing_dir / f"{product_id}.npy", "ab") as f:
+        f.write(b"\x00")
+
+    assert ProcessingEngine().process_product(product_id) is None
+
+
+def _reference_calibration(data):
+    # The original processing chain, expression for expression
+    if data.dtype.kind in ("i", "u"):
+        processed = data.astype(np.float32) / 255.0
+    elif float(np.nanmax(data)) > 1.0:
+        processed = data / 255.0
+    else:
+        processed = data
+    return np.clip(processed, 0.0, 1.0)
+
+
+def test_calibrate_matches_reference_rules():
+    dn = np.array([[0, 51, 255]], dtype=np.uint8)
+    np.testing.assert_array_equal(qc_kernels.calibrate(dn), _reference_calibration(dn))
+
+    # Float data above 1.0 is rescaled, then clamped
+    raw = np.array([-5.0, 127.5, 510.0], dtype=np.float32)
+    np.testing.assert_array_equal(qc_kernels.calibrate(raw), _reference_calibration(raw))
+    np.testing.assert_allclose(qc_kernels.calibrate(raw), [0.0, 0.5, 1.0])
+
+    # Bit for bit on many values, every dtype the chain sees
+    rng = np.random.default_rng(7)
+    for data in (rng.uniform(-10, 300, 100_000).astype(np.float32), rng.uniform(-10, 300, 100_000),
+                 rng.integers(-100, 70_000, 100_000, dtype=np.int32), rng.integers(0, 4096, 100_000, dtype=np.uint16)):
+        result = qc_kernels.calibrate(data)
+        expected = _reference_calibration(data)
+        assert result.dtype == expected.dtype
+        np.testing.assert_array_equal(result, expected)
+
+    # Float data already in range is kept as-is
+    reflectance = np.array([0.1, 0.9], dtype=np.float32)
+    np.testing.assert_array_equal(qc_kernels.calibrate(reflectance), reflectance)
+
+    assert qc_kernels.calibrate(np.array([0.2, np.nan], dtype=np.float32)) is None
+
+
+def test_calibrate_detects_nan_in_any_block():
+    data = np.zeros(3 * qc_kernels.NAN_SCAN_BLOCK + 7, dtype=np.float32)
+    assert qc_kernels.calibrate(data) is not None
+
+    # Negative NaN in the final, partial block
+    data[-1] = -np.nan
+    assert qc_kernels.calibrate(data) is None
+
+    # Infinities are not NaN (they are clamped)
+    big_endian = np.array([np.inf, -np.inf, 0.5], dtype=">f8")
+    np.testing.assert_array_equal(qc_kernels.calibrate(big_endian), [1.0, 0.0, 0.5 / 255.0])
+
+
+def test_calibrate_writes_into_caller_buffer():
+    dn = np.asfortranarray(np.arange(12, dtype=np.uint8).reshape(3, 4))
+    out = np.empty_like(dn, dtype=qc_kernels.calibrated_dtype(dn.dtype))
+
+    assert qc_kernels.calibrate(dn, out=out) is out
+    np.testing.assert_allclose(out, dn / 255.0, rtol=1e-6)
+
+    with pytest.raises(ValueError):
+        qc_kernels.calibrate(dn, out=np.empty((3, 4), dtype=np.float64))
+
+    # A Fortran-ordered input with a C-ordered buffer would pair up the wrong elements
+    raw = np.asfortranarray(np.arange(12, dtype=np.uint16).reshape(3, 4) * 20)
+    with pytest.raises(ValueError):
+        qc_kernels.calibrate(raw, out=np.empty((3, 4), dtype=np.float32))
+    out = np.empty((3, 4), dtype=np.float32, order="F")
+    np.testing.assert_array_equal(qc_kernels.calibrate(raw, out=out), _reference_calibration(raw))
+
+
+def test_process_products_batch_keeps_order(pipeline_dirs):
+    ids = [f"batch_{i}" for i in range(6)]
+    simulator = EOSimulator()
+    ingestion = IngestionManager()
+    for i, product_id in enumerate(ids):
+        simulator.generate_product(product_id, corrupted=(i == 2))
+        ingestion.ingest_product(product_id)
+
+    results = ProcessingEngine().process_products(ids, max_workers=3)
+
+    assert [r is None for r in results] == [False, False, True, False, False, False]
+    assert results[0].endswith("batch_0.npy")
+
+
+def test_calibrate_uint8_fast_path_matches_generic_rule():
+    dn = np.arange(256, dtype=np.uint8)
+    expected = np.clip(dn.astype(np.float64) / 255.0, 0.0, 1.0).astype(np.float32)
+
+    np.testing.assert_array_equal(qc_kernels.calibrate(dn), expected)
+    np.testing.assert_array_equal(qc_kernels._U8_LUT, expected)
+
+
+def test_batch_write_syncs_every_file(tmp_path, monkeypatch):
+    from secure_eo_pipeline.utils.io_uring_backend import BatchIO
+
+    synced = []
+    real_fdatasync = os.fdatasync
+    monkeypatch.setattr(os, "fdatasync", lambda fd: synced.append(fd) or real_fdatasync(fd))
+
+    io = BatchIO()
+    if io.backend != "posix":
+        pytest.skip("io_uring issues the syncs itself")
+    data_path, meta_path = str(tmp_path / "p.npy"), str(tmp_path / "p.json")
+    io.write_files([(data_path, b"x" * 5000), (meta_path, b"{}")], direct_paths={data_path}, sync=True)
+
+    assert len(synced) == 2
+    assert os.path.getsize(data_path) == 5000
+
+
+def test_batch_read_uses_registered_buffers(tmp_path, monkeypatch, fake_liburing):
+    from secure_eo_pipeline.utils import io_uring_backend
+
+    fixed_reads = []
+    fake_liburing(fixed_reads)
+    monkeypatch.setattr(io_uring_backend, "FIXED_BUFFER_COUNT", 2)
+
+    payloads = [b"{}", os.urandom(io_uring_backend.FIXED_BUFFER_SIZE + 1), b"", b'{"a": 1}', b"[]"]
+    paths = []
+    for i, payload in enumerate(payloads):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(payload)
+        paths.append(str(path))
+
+    io = io_uring_backend.BatchIO()
+    assert io.backend == "io_uring"
+    assert io.read_files(paths) == payloads
+    # Small files take the registered buffers while they last; large ones never do
+    assert fixed_reads == [0, 1]
+    assert io.read_files(paths[:1]) == payloads[:1]  # Buffers are reused by the next batch
+    io.close()
+
+
+def test_batch_read_missing_path_leaks_no_fds(tmp_path, monkeypatch, fake_liburing):
+    from secure_eo_pipeline.utils import io_uring_backend
+
+    fake_liburing()
+    paths = []
+    for i in range(3):
+        (tmp_path / f"f{i}").write_bytes(b"{}")
+        paths.append(str(tmp_path / f"f{i}"))
+    paths.insert(2, str(tmp_path / "missing"))
+
+    opened, closed = [], []
+    real_open, real_close = os.open, os.close
+    monkeypatch.setattr(io_uring_backend.os, "open", lambda *a: opened.append(real_open(*a)) or opened[-1])
+    monkeypatch.setattr(io_uring_backend.os, "close", lambda fd: closed.append(fd) or real_close(fd))
+
+    io = io_uring_backend.BatchIO()
+    with pytest.raises(FileNotFoundError):
+        io.read_files(paths)
+    io.close()
+    assert len(opened) == 2 and sorted(closed) == sorted(opened)
+
+
+def test_batch_error_reaps_the_whole_group(tmp_path, monkeypatch, fake_liburing):
+    from secure_eo_pipeline.utils import io_uring_backend
+
+    paths = []
+    for i in range(4):
+        (tmp_path / f"f{i}").write_bytes(b"x" * 100)
+        paths.append(str(tmp_path / f"f{i}"))
+    failing = set()
+    real_open = os.open
+
+    def open_failing_second(path, flags, *args):
+        fd = real_open(path, flags, *args)
+        if path == paths[1]:
+            failing.add(fd)
+        return fd
+
+    fake_liburing(failing=failing)
+    monkeypatch.setattr(io_uring_backend.os, "open", open_failing_second)
+    io = io_uring_backend.BatchIO()
+    with pytest.raises(OSError) as raised:
+        io.read_files(paths)
+    assert raised.value.filename == paths[1]
+    assert io._ring.done == []  # No completion left behind for the next batch
+    io.close()
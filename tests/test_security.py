@@ -1,21 +1,15 @@
 import pytest
 import os
 from secure_eo_pipeline.utils import security
+from secure_eo_pipeline.utils import fileops
 from secure_eo_pipeline import config
 
 @pytest.fixture
-def temp_key_file(tmp_path):
-    # Create a temp key file path
+def temp_key_file(tmp_path, monkeypatch):
+    # Create a temp key file path (monkeypatch restores the real one afterwards)
     key_path = tmp_path / "test_secret.key"
-    original_key_path = config.KEY_PATH
-    config.KEY_PATH = str(key_path)
-    
-    yield key_path
-    
-    # Cleanup
-    config.KEY_PATH = original_key_path
-    if os.path.exists(key_path):
-        os.remove(key_path)
+    monkeypatch.setattr(config, "KEY_PATH", str(key_path))
+    return key_path
 
 def test_generate_and_load_key(temp_key_file):
     # Test generation
@@ -26,6 +20,29 @@ def test_generate_and_load_key(temp_key_file):
     key = security.load_key()
     assert isinstance(key, bytes)
     assert len(key) > 0
+    if os.name == "posix":
+        assert os.stat(config.KEY_PATH).st_mode & 0o777 == 0o600
+
+    # The cipher object is built once per key and reused
+    assert security._aead(key) is security._aead(key)
+
+    # Regenerating replaces the key (no stale staging file left behind)
+    # and forgets the cipher objects of the old one
+    security.generate_key()
+    assert security.load_key() != key
+    assert security._aead.cache_info().currsize == 0
+    assert not list(temp_key_file.parent.glob("*.tmp"))
+
+def test_load_key_follows_key_file_replacement(temp_key_file, tmp_path):
+    security.generate_key()
+    key = security.load_key()
+    assert security.load_key() is key  # Cached: the file is not re-read
+
+    # Another process rotates the key (new file renamed into place)
+    staged = tmp_path / "other.key"
+    staged.write_bytes(security._new_key())
+    os.replace(staged, config.KEY_PATH)
+    assert security.load_key() == temp_key_file.read_bytes() != key
 
 def test_encrypt_decrypt_file(temp_key_file, tmp_path):
     # Setup
@@ -72,3 +89,539 @@ def test_calculate_hash(tmp_path):
         
     hash2 = security.calculate_hash(str(test_file))
     assert hash1 != hash2
+
+
+def test_calculate_hashes_batch_matches_scalar(tmp_path, monkeypatch):
+    paths = []
+    for i, size in enumerate((0, 1000, security.MMAP_MIN_SIZE + 7)):
+        path = tmp_path / f"p{i}.npy"
+        path.write_bytes(os.urandom(size))
+        paths.append(str(path))
+    paths.append(str(tmp_path / "missing.npy"))
+    expected = [security.calculate_hash(p) for p in paths]
+
+    monkeypatch.setattr(os, "cpu_count", lambda: 4)  # Force the threaded path
+    assert security.calculate_hashes(paths) == expected
+    assert expected[-1] is None
+    assert security.calculate_hashes(paths[:1]) == expected[:1]
+    assert security.calculate_hashes([]) == []
+
+
+def test_mapped_hash_advises_sequential_reads(tmp_path, monkeypatch):
+    import hashlib
+
+    advised = []
+    monkeypatch.setattr(security.io_uring_backend, "advise_sequential", advised.append)
+    data = os.urandom(security.MMAP_MIN_SIZE)
+    path = tmp_path / "scene.npy"
+    path.write_bytes(data)
+
+    assert security.calculate_hash(str(path)) == hashlib.sha256(data).hexdigest()
+    assert len(advised) == 1
+
+
+def test_calculate_hash_small_and_mapped_paths(tmp_path):
+    import hashlib
+
+    # Below, at and above the mmap threshold
+    for size in (0, 1000, security.MMAP_MIN_SIZE, security.MMAP_MIN_SIZE + 12345):
+        data = os.urandom(size)
+        path = tmp_path / f"f{size}.bin"
+        path.write_bytes(data)
+        assert security.calculate_hash(str(path)) == hashlib.sha256(data).hexdigest()
+
+def test_encrypt_uses_gcm_and_reads_legacy_fernet(temp_key_file, tmp_path):
+    from cryptography.fernet import Fernet
+
+    security.generate_key()
+    key = security.load_key()
+    test_file = tmp_path / "product.npy"
+    test_file.write_bytes(b"raster bytes")
+
+    # New archives carry the GCM header
+    security.encrypt_file(str(test_file))
+    assert test_file.read_bytes().startswith(security.GCM_MAGIC)
+
+    # A flipped bit must be detected by the tag
+    blob = bytearray(test_file.read_bytes())
+    blob[-1] ^= 0x01
+    test_file.write_bytes(bytes(blob))
+    with pytest.raises(Exception):
+        security.decrypt_file(str(test_file))
+    # ...and the file is left exactly as it was (no unauthenticated plaintext)
+    assert test_file.read_bytes() == bytes(blob)
+    assert not list(tmp_path.glob("*.tmp"))
+
+    # Archives written before the switch (Fernet tokens) still decrypt
+    test_file.write_bytes(Fernet(key).encrypt(b"legacy raster"))
+    security.decrypt_file(str(test_file))
+    assert test_file.read_bytes() == b"legacy raster"
+
+def test_encrypt_file_to_streams_into_destination(temp_key_file, tmp_path):
+    security.generate_key()
+    source = tmp_path / "product.npy"
+    dest = tmp_path / "product.enc"
+    # Spans several streaming blocks plus a partial one
+    original_content = os.urandom(3 * security.ENCRYPT_CHUNK_SIZE + 123)
+    source.write_bytes(original_content)
+
+    security.encrypt_file_to(str(source), str(dest))
+
+    # Source is untouched, destination never holds the cleartext
+    assert source.read_bytes() == original_content
+    assert dest.read_bytes().startswith(security.GCM_MAGIC)
+
+    security.decrypt_file(str(dest))
+    assert dest.read_bytes() == original_content
+
+def test_sha256_backend_dispatch():
+    import hashlib
+
+    assert security.SHA256_BACKEND in {"openssl+sha_ni", "openssl+armv8_sha2", "isal+sha_ni", "simd+sha_ni", "openssl+avx2", "scalar"}
+    # Whatever backend was selected, the digest must be plain SHA-256
+    assert security._hash(b"EO") == hashlib.sha256(b"EO").digest()
+
+def test_copy_and_hash_matches_calculate_hash(tmp_path):
+    source = tmp_path / "raw.npy"
+    dest = tmp_path / "staged.npy"
+    source.write_bytes(os.urandom(2 * security.HASH_CHUNK_SIZE + 5))
+
+    digest = security.copy_and_hash(str(source), str(dest))
+
+    assert dest.read_bytes() == source.read_bytes()
+    assert digest == security.calculate_hash(str(source))
+
+@pytest.mark.skipif(fileops.fcntl is None, reason="FICLONE needs fcntl")
+def test_copy_and_fingerprint_hashes_the_reflinked_copy(tmp_path, monkeypatch):
+    source = tmp_path / "raw.npy"
+    payload = os.urandom(2 * security.HASH_CHUNK_SIZE + 5)
+    source.write_bytes(payload)
+    expected = security.copy_and_fingerprint(str(source), str(tmp_path / "copied.npy"))
+
+    def fake_ioctl(dst_fd, request, src_fd):
+        assert request == fileops.FICLONE
+        os.write(dst_fd, os.pread(src_fd, len(payload), 0))  # What a reflink looks like to readers
+
+    monkeypatch.setattr(fileops.fcntl, "ioctl", fake_ioctl)
+    monkeypatch.setattr(security, "_write_all", None)  # A clone must not be written through user space
+    for name, data in (("cloned.npy", payload), ("empty.npy", b"")):
+        source.write_bytes(data)
+        dest = tmp_path / name
+        fingerprint = security.copy_and_fingerprint(str(source), str(dest))
+        assert dest.read_bytes() == data
+        assert fingerprint == (expected if data else (security.calculate_hash_bytes(b""), security.calculate_checksum(b"")))
+
+def test_unchanged_files_are_not_hashed_twice(tmp_path, monkeypatch):
+    source = tmp_path / "raw.npy"
+    payload = os.urandom(security.MMAP_MIN_SIZE + 3)
+    source.write_bytes(payload)
+    monkeypatch.setattr(security, "_fingerprint_cache", {})
+
+    # Just written: too recent for its timestamps to be trusted
+    digest = security.calculate_hash(str(source))
+    assert security._fingerprint_cache == {}
+
+    monkeypatch.setattr(security, "FINGERPRINT_CACHE_MIN_AGE_NS", 0)
+    fingerprint = security.copy_and_fingerprint(str(source), str(tmp_path / "first.npy"))
+    assert fingerprint[0] == digest
+
+    real_sha256 = security._sha256
+    monkeypatch.setattr(security, "_sha256", None)  # Any hashing now fails
+    assert security.calculate_hash(str(source)) == digest
+    assert security.copy_and_fingerprint(str(source), str(tmp_path / "again.npy")) == fingerprint
+    assert (tmp_path / "again.npy").read_bytes() == payload
+
+    # A modified file has a new identity and is hashed again
+    monkeypatch.setattr(security, "_sha256", real_sha256)
+    source.write_bytes(payload + b"!")
+    assert security.calculate_hash(str(source)) == security.calculate_hash_bytes(payload + b"!")
+
+def test_checksum_precheck():
+    recorded = security.calculate_checksum(b"raster")
+    assert recorded.startswith(security.CHECKSUM_ALGORITHM + ":")
+
+    assert security.checksum_matches(b"raster", recorded) is True
+    assert security.checksum_matches(b"rastes", recorded) is False
+    # Nothing recorded / algorithm unknown here: no verdict, SHA-256 decides
+    assert security.checksum_matches(b"raster", None) is None
+    assert security.checksum_matches(b"raster", "xxhash:00000000") is None
+
+def test_archive_bound_to_product_id(temp_key_file, tmp_path):
+    security.generate_key()
+    source = tmp_path / "p1.npy"
+    source.write_bytes(b"raster for p1")
+    archive = tmp_path / "p1.enc"
+
+    security.encrypt_file_to(str(source), str(archive), context="p1")
+    assert archive.read_bytes().startswith(security.GCM_MAGIC_BOUND)
+
+    # Delivered under another product's name: refused
+    swapped = tmp_path / "p2.enc"
+    swapped.write_bytes(archive.read_bytes())
+    with pytest.raises(ValueError):
+        security.decrypt_file(str(swapped), context="p2")
+
+    # Tampering with the clear-text binding breaks the tag
+    forged = bytearray(archive.read_bytes())
+    forged[7] ^= 0x01  # Flip a bit of the product ID
+    swapped.write_bytes(bytes(forged))
+    with pytest.raises(Exception):
+        security.decrypt_file(str(swapped))
+
+    security.decrypt_file(str(archive), context="p1")
+    assert archive.read_bytes() == b"raster for p1"
+
+def test_decrypt_file_to_streams_from_archive(temp_key_file, tmp_path):
+    security.generate_key()
+    source = tmp_path / "p1.npy"
+    archive = tmp_path / "p1.enc"
+    delivered = tmp_path / "delivered.npy"
+    payload = os.urandom(2 * security.ENCRYPT_CHUNK_SIZE + 99)
+    source.write_bytes(payload)
+    security.encrypt_file_to(str(source), str(archive), context="p1")
+    archived = archive.read_bytes()
+
+    security.decrypt_file_to(str(archive), str(delivered), context="p1")
+    assert delivered.read_bytes() == payload
+    assert archive.read_bytes() == archived  # Master copy untouched
+
+    # A corrupted archive yields no output file at all
+    corrupted = bytearray(archived)
+    corrupted[len(corrupted) // 2] ^= 0x01
+    archive.write_bytes(bytes(corrupted))
+    delivered.unlink()
+    with pytest.raises(Exception):
+        security.decrypt_file_to(str(archive), str(delivered), context="p1")
+    assert not delivered.exists()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_failed_decrypt_keeps_existing_output(temp_key_file, tmp_path):
+    security.generate_key()
+    source = tmp_path / "p1.npy"
+    source.write_bytes(os.urandom(5000))
+    archive = tmp_path / "p1.enc"
+    security.encrypt_file_to(str(source), str(archive), context="P1")
+    out = tmp_path / "out.npy"
+    out.write_bytes(b"delivered earlier")
+
+    # Missing archive, then an archive bound to another product
+    with pytest.raises(FileNotFoundError):
+        security.decrypt_file_to(str(tmp_path / "missing.enc"), str(out), context="P1")
+    with pytest.raises(ValueError):
+        security.decrypt_file_to(str(archive), str(out), context="OTHER")
+    assert out.read_bytes() == b"delivered earlier"
+    assert not list(tmp_path.glob("*.tmp"))
+
+def test_encrypt_file_to_direct_io_path(temp_key_file, tmp_path, monkeypatch):
+    # Force the O_DIRECT writer (falls back to buffered writes where refused)
+    monkeypatch.setattr(security, "DIRECT_IO_MIN_SIZE", 0)
+    security.generate_key()
+    source = tmp_path / "big.npy"
+    dest = tmp_path / "big.enc"
+    original_content = os.urandom(2 * security.ENCRYPT_CHUNK_SIZE + 4097)
+    source.write_bytes(original_content)
+
+    security.encrypt_file_to(str(source), str(dest), context="big")
+
+    # Block padding is trimmed: header + ciphertext + tag only
+    header = len(security._gcm_prefix("big")) + security.GCM_NONCE_SIZE
+    assert dest.stat().st_size == header + len(original_content) + 16
+    out = tmp_path / "out.npy"
+    security.decrypt_file_to(str(dest), str(out), context="big")
+    assert out.read_bytes() == original_content
+
+
+def test_encrypt_file_to_mapped_and_buffered_inputs(temp_key_file, tmp_path, monkeypatch):
+    security.generate_key()
+    payload = os.urandom(security.ENCRYPT_CHUNK_SIZE + 777)
+    source = tmp_path / "p.npy"
+    source.write_bytes(payload)
+
+    # Mapped input (the default for this size) and the read-buffer loop
+    for min_size in (security.MMAP_MIN_SIZE, len(payload) + 1):
+        monkeypatch.setattr(security, "MMAP_MIN_SIZE", min_size)
+        archive = tmp_path / f"p{min_size}.enc"
+        out = tmp_path / f"p{min_size}.out"
+        security.encrypt_file_to(str(source), str(archive), context="p")
+        security.decrypt_file_to(str(archive), str(out), context="p")
+        assert out.read_bytes() == payload
+
+
+def test_sha256_backend_detects_armv8_sha2(monkeypatch):
+    import hashlib
+    import sys
+
+    monkeypatch.setitem(sys.modules, "cpufeature", None)  # Force the /proc/cpuinfo path
+    monkeypatch.setattr(security, "_CPU_FLAGS", frozenset({"fp", "asimd", "sha2"}))
+    constructor, name = security._select_sha256_backend()
+    assert name in ("openssl+armv8_sha2", "isal+sha_ni", "simd+sha_ni")
+    assert constructor(b"abc").hexdigest() == hashlib.sha256(b"abc").hexdigest()
+
+    monkeypatch.setattr(security, "_CPU_FLAGS", frozenset({"fp"}))
+    assert security._select_sha256_backend()[1] == "scalar"
+
+
+def test_optional_sha256_binding_must_match_test_vector(monkeypatch):
+    import hashlib
+    import sys
+    import types
+
+    class Broken:
+        def update(self, data):
+            pass
+
+        def digest(self):
+            return bytes(32)
+
+    monkeypatch.setitem(sys.modules, "isal_crypto", types.SimpleNamespace(SHA256=Broken))
+    monkeypatch.setitem(sys.modules, "hashlib_simd", types.SimpleNamespace(sha256=hashlib.sha256))
+    assert security._optional_sha256_binding() == (hashlib.sha256, "simd+sha_ni")
+
+    monkeypatch.setitem(sys.modules, "hashlib_simd", None)
+    assert security._optional_sha256_binding() is None
+
+
+def test_in_place_rewrites_sync_before_rename(temp_key_file, tmp_path, monkeypatch):
+    security.generate_key()
+    target = tmp_path / "p.npy"
+    target.write_bytes(os.urandom(10000))
+    events = []
+    real_replace = os.replace
+    monkeypatch.setattr(os, "fdatasync", lambda fd: events.append("sync"), raising=False)
+    monkeypatch.setattr(os, "fsync", lambda fd: events.append("sync"))
+    monkeypatch.setattr(os, "replace", lambda a, b: (events.append("replace"), real_replace(a, b)))
+
+    security.encrypt_file(str(target))
+    security.decrypt_file(str(target))
+    assert events == ["sync", "replace"] * 2
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    security.encrypt_file_to(str(target), str(archive / "p.enc"))
+    events.clear()
+    assert security.rotate_keys(str(archive), str(tmp_path / "none")) is True
+
+    # Archive .tmp and the staged key are both synced before the first rename
+    assert events == ["sync", "sync", "replace", "replace"]
+
+
+def test_rotate_keys_reencrypts_every_archive(temp_key_file, tmp_path):
+    security.generate_key()
+    archive, backup = tmp_path / "archive", tmp_path / "backup"
+    archive.mkdir()
+    backup.mkdir()
+    payloads = {f"p{i}": os.urandom(5000 + i) for i in range(5)}
+    for pid, data in payloads.items():
+        (tmp_path / pid).write_bytes(data)
+        security.encrypt_file_to(str(tmp_path / pid), str(archive / f"{pid}.enc"), context=pid)
+        (backup / f"{pid}.enc").write_bytes((archive / f"{pid}.enc").read_bytes())
+    old_key = security.load_key()
+
+    assert security.rotate_keys(str(archive), str(backup)) is True
+    assert security.load_key() != old_key
+    for pid, data in payloads.items():
+        for zone in (archive, backup):
+            out = tmp_path / f"{pid}.out"
+            security.decrypt_file_to(str(zone / f"{pid}.enc"), str(out), context=pid)
+            assert out.read_bytes() == data
+
+    # A file that does not decrypt aborts the rotation and keeps the current key
+    (archive / "junk.enc").write_bytes(b"not an archive")
+    current = security.load_key()
+    assert security.rotate_keys(str(archive), str(backup)) is False
+    assert security.load_key() == current
+    security.decrypt_file_to(str(archive / "p0.enc"), str(tmp_path / "p0.out"), context="p0")
+    assert (tmp_path / "p0.out").read_bytes() == payloads["p0"]
+    assert not list(archive.glob("*.tmp"))
+    assert not os.path.exists(config.KEY_PATH + ".new")
+
+
+def test_interrupted_rotation_keeps_the_new_key_on_disk(temp_key_file, tmp_path, monkeypatch):
+    security.generate_key()
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    payloads = {f"p{i}": os.urandom(4000 + i) for i in range(2)}
+    for pid, data in payloads.items():
+        (tmp_path / pid).write_bytes(data)
+        security.encrypt_file_to(str(tmp_path / pid), str(archive / f"{pid}.enc"), context=pid)
+    old_key = security.load_key()
+
+    # The second archive rename fails: the first archive already needs the new key
+    renames = []
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        renames.append(dst)
+        if len(renames) == 2:
+            raise OSError("disk gone")
+        real_replace(src, dst)
+
+    monkeypatch.setattr(os, "replace", failing_replace)
+    assert security.rotate_keys(str(archive), str(tmp_path / "none")) is False
+    monkeypatch.setattr(os, "replace", real_replace)
+    staged = config.KEY_PATH + ".new"
+    assert security.load_key() == old_key
+    assert (os.stat(staged).st_mode & 0o777) == 0o600
+
+    # A second rotation must not overwrite the only copy of that key
+    assert security.rotate_keys(str(archive), str(tmp_path / "none")) is False
+
+    os.replace(staged, config.KEY_PATH)
+    pid = os.path.basename(renames[0])[:-len(".enc")]
+    security.decrypt_file_to(renames[0], str(tmp_path / "out"), context=pid)
+    assert (tmp_path / "out").read_bytes() == payloads[pid]
+
+
+def test_archive_reads_drop_their_page_cache(temp_key_file, tmp_path, monkeypatch):
+    from secure_eo_pipeline.utils import io_uring_backend
+
+    security.generate_key()
+    source = tmp_path / "p.npy"
+    source.write_bytes(os.urandom(300_000))
+    archive = tmp_path / "p.enc"
+    security.encrypt_file_to(str(source), str(archive), context="p")
+    dropped = []
+    monkeypatch.setattr(io_uring_backend, "drop_page_cache", dropped.append)
+
+    assert security.verify_file(str(archive), context="p") is True
+    security.decrypt_file_to(str(archive), str(tmp_path / "out.npy"), context="p")
+    assert len(dropped) == 2
+    assert (tmp_path / "out.npy").read_bytes() == source.read_bytes()
+
+
+def test_reencrypt_pipeline_stops_at_first_failure(temp_key_file, tmp_path, monkeypatch):
+    monkeypatch.setattr(security, "ROTATION_QUEUE_DEPTH", 1)  # Stages block on each other
+    security.generate_key()
+    old_key, new_key = security.load_key(), security._new_key()
+    targets = []
+    for i in range(8):
+        path = tmp_path / f"p{i}.enc"
+        path.write_bytes(security._encrypt_bytes(old_key, b"raster %d" % i, f"p{i}"))
+        targets.append(str(path))
+
+    assert security._reencrypt_all(targets, old_key, new_key) is None
+    for i, path in enumerate(targets):
+        staged = open(path + ".tmp", "rb").read()
+        assert security._decrypt_bytes(new_key, staged, f"p{i}") == b"raster %d" % i
+
+    # An unreadable file ends the pipeline (without hanging) and is reported
+    missing = str(tmp_path / "gone.enc")
+    path, error = security._reencrypt_all(targets[:3] + [missing] + targets[3:], old_key, new_key)
+    assert path == missing and isinstance(error, FileNotFoundError)
+
+
+def test_reencrypt_wipes_the_cleartext(temp_key_file, monkeypatch):
+    old_key, new_key = security._new_key(), security._new_key()
+    wiped = []
+    real_wipe = security._wipe
+    monkeypatch.setattr(security, "_wipe", lambda buf: (real_wipe(buf), wiped.append(buf)))
+
+    archive = security._encrypt_bytes(old_key, b"classified raster", "p1")
+    rotated = security._reencrypt_blob(archive, old_key, new_key)
+    assert security._decrypt_bytes(new_key, rotated, "p1") == b"classified raster"
+    assert len(wiped) == 1 and not any(wiped[0])
+
+    # Also on failure (wrong key): nothing decrypted is left behind
+    with pytest.raises(Exception):
+        security._reencrypt_blob(archive, new_key, old_key)
+    assert len(wiped) == 2 and not any(wiped[1])
+
+
+def test_reencrypt_without_decrypt_into(monkeypatch):
+    # Older 'cryptography' releases: streaming decryptor instead of decrypt_into
+    class LegacyAEAD:
+        def __init__(self, aead):
+            self.encrypt, self.decrypt = aead.encrypt, aead.decrypt
+
+    real_aead = security._aead
+    monkeypatch.setattr(security, "_aead", lambda key: LegacyAEAD(real_aead(key)))
+    old_key, new_key = security._new_key(), security._new_key()
+    archive = security._encrypt_bytes(old_key, os.urandom(70_000), "p2")
+    rotated = security._reencrypt_blob(archive, old_key, new_key)
+    assert security._decrypt_bytes(new_key, rotated, "p2") == security._decrypt_bytes(old_key, archive, "p2")
+
+
+@pytest.mark.parametrize("has_decrypt_into", [True, False])
+def test_reencrypt_batch_container_wipes_the_cleartext(monkeypatch, has_decrypt_into):
+    if not has_decrypt_into:
+        class LegacyAEAD:
+            def __init__(self, aead):
+                self.encrypt, self.decrypt = aead.encrypt, aead.decrypt
+        real_aead = security._aead
+        monkeypatch.setattr(security, "_aead", lambda key: LegacyAEAD(real_aead(key)))
+    monkeypatch.setattr(security, "BATCH_SEGMENT_SIZE", 4096)
+    wiped = []
+    real_wipe = security._wipe
+    monkeypatch.setattr(security, "_wipe", lambda buf: (real_wipe(buf), wiped.append(buf)))
+
+    old_key, new_key = security._new_key(), security._new_key()
+    plaintext = os.urandom(3 * 4096 + 100)  # Several segments, the last one short
+    container = security._encrypt_segments(old_key, plaintext, "b1")
+    rotated = security._reencrypt_blob(container, old_key, new_key)
+    assert security._decrypt_segments(new_key, memoryview(rotated)) == plaintext
+    assert len(wiped) == 1 and len(wiped[0]) == len(plaintext) and not any(wiped[0])
+
+    # A tampered last segment: the segments already opened are wiped too
+    tampered = bytearray(container)
+    tampered[-1] ^= 1
+    with pytest.raises(Exception):
+        security._reencrypt_blob(bytes(tampered), old_key, new_key)
+    assert len(wiped) == 2 and not any(wiped[1])
+
+
+def test_small_and_streamed_archives_share_one_format(temp_key_file, tmp_path, monkeypatch):
+    security.generate_key()
+    source = tmp_path / "p.npy"
+    source.write_bytes(b"\x00" * 50_000 + os.urandom(1000))
+
+    # One-shot (default for this size), then forced through the streaming writer
+    for one_shot_max in (security.ONE_SHOT_MAX_SIZE, 0):
+        monkeypatch.setattr(security, "ONE_SHOT_MAX_SIZE", one_shot_max)
+        archive = tmp_path / f"p{one_shot_max}.enc"
+        compression = security.encrypt_file_to(str(source), str(archive), context="p", compress=True)
+        if security.HAVE_ZSTD:
+            assert archive.read_bytes()[:4] == security.GCM_MAGIC_BOUND_ZSTD
+            assert compression and archive.stat().st_size < 10_000
+        else:
+            assert archive.read_bytes()[:4] == security.GCM_MAGIC_BOUND
+        out = tmp_path / "out.npy"
+        security.decrypt_file_to(str(archive), str(out), context="p")
+        assert out.read_bytes() == source.read_bytes()
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+@pytest.mark.skipif(not security.HAVE_ZSTD, reason="zstandard not installed")
+def test_plaintext_starting_with_zstd_magic_round_trips(temp_key_file, tmp_path, monkeypatch):
+    security.generate_key()
+    import zstandard
+    # A user file that genuinely is (or starts like) a zstd frame
+    payload = zstandard.ZstdCompressor().compress(b"inner" * 1000)
+    source = tmp_path / "p.zst"
+
+    # In-place encrypt/decrypt: never compressed, so never decompressed
+    source.write_bytes(payload)
+    security.encrypt_file(str(source))
+    security.decrypt_file(str(source))
+    assert source.read_bytes() == payload
+
+    # Archive path: compressed or not, both sizes, the bytes come back unchanged
+    for one_shot_max in (security.ONE_SHOT_MAX_SIZE, 0):
+        monkeypatch.setattr(security, "ONE_SHOT_MAX_SIZE", one_shot_max)
+        for compress in (False, True):
+            archive = tmp_path / "p.enc"
+            security.encrypt_file_to(str(source), str(archive), context="p", compress=compress)
+            out = tmp_path / "out.zst"
+            security.decrypt_file_to(str(archive), str(out), context="p")
+            assert out.read_bytes() == payload
+
+
+def test_compression_flag_is_authenticated(temp_key_file, tmp_path):
+    security.generate_key()
+    source = tmp_path / "p.npy"
+    source.write_bytes(os.urandom(5000))
+    archive = tmp_path / "p.enc"
+    security.encrypt_file_to(str(source), str(archive))
+    # Flipping an unbound archive's magic to the compressed variant is rejected
+    tampered = security.GCM_MAGIC_ZSTD + archive.read_bytes()[4:]
+    archive.write_bytes(tampered)
+    assert not security.verify_file(str(archive))
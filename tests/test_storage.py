@@ -0,0 +1,224 @@
+import gc
+
+import numpy as np
+import pytest
+
+from secure_eo_pipeline import config
+from secure_eo_pipeline.components.data_source import EOSimulator
+from secure_eo_pipeline.components.ingestion import IngestionManager
+from secure_eo_pipeline.components.processing import ProcessingEngine
+from secure_eo_pipeline.components.storage import ArchiveManager
+from secure_eo_pipeline.db import catalog
+
+
+@pytest.fixture
+def vault_dirs(tmp_path, monkeypatch):
+    for name, sub in (("INGEST_DIR", "ingest"), ("PROCESSING_DIR", "processing"), ("ARCHIVE_DIR", "archive")):
+        monkeypatch.setattr(config, name, str(tmp_path / sub))
+    monkeypatch.setattr(config, "KEY_PATH", str(tmp_path / "secret.key"))
+    monkeypatch.setattr(config, "CATALOG_DB", str(tmp_path / "catalog.db"))
+    return tmp_path
+
+
+def _stage(product_ids):
+    simulator, ingestion, processing = EOSimulator(), IngestionManager(), ProcessingEngine()
+    for product_id in product_ids:
+        simulator.generate_product(product_id)
+        ingestion.ingest_product(product_id)
+        processing.process_product(product_id)
+
+
+def test_archive_and_retrieve_round_trip(vault_dirs):
+    _stage(["vault_1"])
+    expected = np.load(vault_dirs / "processing" / "vault_1.npy")
+
+    archived = ArchiveManager().archive_product("vault_1")
+    assert archived.endswith("vault_1.enc")
+
+    output = vault_dirs / "delivered.npy"
+    assert ArchiveManager().retrieve_product("vault_1", str(output)) is True
+    np.testing.assert_array_equal(np.load(output), expected)
+
+
+def test_archive_products_batch(vault_dirs):
+    ids = ["vault_a", "vault_b", "vault_c"]
+    _stage(ids)
+
+    results = ArchiveManager().archive_products(ids + ["never_processed"], max_workers=2)
+
+    assert [r is not None for r in results] == [True, True, True, False]
+    assert all((vault_dirs / "archive" / f"{i}.enc").exists() for i in ids)
+
+
+def test_archive_product_accepts_in_memory_metadata(vault_dirs):
+    import json
+
+    _stage(["vault_meta"])
+    with open(vault_dirs / "processing" / "vault_meta.json") as f:
+        meta = json.load(f)
+    meta["operator_note"] = "handed over in memory"
+
+    assert ArchiveManager().archive_product("vault_meta", meta=meta) is not None
+
+    record = catalog.get("vault_meta")
+    assert record["status"] == "ARCHIVED"
+    assert record["operator_note"] == "handed over in memory"
+    assert "status" in meta and meta["status"] == "PROCESSED"  # Caller's dict untouched
+
+
+def test_retrieve_missing_product_fails_cleanly(vault_dirs):
+    output = vault_dirs / "delivered.npy"
+    assert ArchiveManager().retrieve_product("not_in_vault", str(output)) is False
+    assert not output.exists()
+
+
+def test_archive_batch_single_container(vault_dirs, monkeypatch):
+    from secure_eo_pipeline.utils import security
+
+    # Small segments so products straddle segment boundaries
+    monkeypatch.setattr(security, "BATCH_SEGMENT_SIZE", 4096)
+    ids = ["batch_a", "batch_b", "batch_c"]
+    _stage(ids)
+    expected = {i: np.load(vault_dirs / "processing" / f"{i}.npy") for i in ids}
+
+    container = ArchiveManager().archive_batch(ids + ["never_processed"], batch_id="b1")
+    assert container.endswith("b1.eob")
+    assert sorted(p.name for p in (vault_dirs / "archive").iterdir()) == ["b1.eob", "b1.index.json"]
+    assert not (vault_dirs / "processing" / "batch_a.npy").exists()
+
+    for i in ids:
+        output = vault_dirs / f"{i}.out.npy"
+        assert ArchiveManager().retrieve_from_batch("b1", i, str(output)) is True
+        np.testing.assert_array_equal(np.load(output), expected[i])
+    assert ArchiveManager().retrieve_from_batch("b1", "never_processed", str(vault_dirs / "x.npy")) is False
+
+    # Flipping a ciphertext byte is detected
+    raw = bytearray((vault_dirs / "archive" / "b1.eob").read_bytes())
+    raw[100] ^= 1
+    (vault_dirs / "archive" / "b1.eob").write_bytes(bytes(raw))
+    assert ArchiveManager().retrieve_from_batch("b1", "batch_a", str(vault_dirs / "y.npy")) is False
+
+
+def test_failed_batch_leaves_no_catalog_records(vault_dirs, monkeypatch):
+    from secure_eo_pipeline.utils import security
+
+    monkeypatch.setattr(config, "USE_SQLITE", True)
+    ids = ["sealfail_a", "sealfail_b"]
+    _stage(ids)
+
+    def failing_close(self):
+        raise OSError("disk full")
+    monkeypatch.setattr(security.EncryptingWriter, "close", failing_close)
+
+    assert ArchiveManager().archive_batch(ids, batch_id="b2") is None
+    assert list((vault_dirs / "archive").iterdir()) == []
+    for product_id in ids:
+        record = catalog.get(product_id)
+        assert record is None or record["status"] != "ARCHIVED"
+
+
+def test_archive_array_streams_without_staging_file(vault_dirs):
+    data = np.linspace(0, 1, 3000, dtype=np.float32).reshape(30, 100)
+
+    archived = ArchiveManager().archive_array("direct_1", data, {"id": "direct_1", "status": "PROCESSED"})
+
+    assert archived.endswith("direct_1.enc")
+    assert not (vault_dirs / "processing").exists()
+    output = vault_dirs / "delivered.npy"
+    assert ArchiveManager().retrieve_product("direct_1", str(output)) is True
+    np.testing.assert_array_equal(np.load(output), data)
+
+
+def test_archive_writer_discards_partial_archive_on_error(vault_dirs):
+    with pytest.raises(RuntimeError):
+        with ArchiveManager().open_archive_writer("broken") as writer:
+            writer.write(b"partial")
+            raise RuntimeError("producer failed")
+    assert list((vault_dirs / "archive").iterdir()) == []
+
+
+def test_dropped_archive_writer_publishes_nothing(vault_dirs):
+    writer = ArchiveManager().open_archive_writer("dropped")
+    writer.write(b"first half of the raster")
+    del writer  # Never closed: e.g. the producer returned early
+    gc.collect()
+    assert list((vault_dirs / "archive").iterdir()) == []
+    assert ArchiveManager().verify_product("dropped") is False
+
+
+def test_catalog_search_uses_indexed_fields(vault_dirs):
+    ids = ["cat_1", "cat_2"]
+    _stage(ids)
+    for product_id in ids:
+        ArchiveManager().archive_product(product_id)
+
+    found = catalog.search(sensor="Simulated-HyperSpectral-1", status="ARCHIVED")
+    assert [m["product_id"] for m in found] == ids  # Ordered by acquisition time
+    assert catalog.search(sensor="other-sensor") == []
+    assert catalog.search(start_time=found[1]["timestamp"])[0]["product_id"] == "cat_2"
+    assert not (vault_dirs / "archive" / "cat_1.json").exists()  # No per-product record file
+
+
+def test_file_only_mode_keeps_json_record(vault_dirs, monkeypatch):
+    monkeypatch.setattr(config, "USE_SQLITE", False)
+    _stage(["file_mode"])
+    ArchiveManager().archive_product("file_mode")
+    assert (vault_dirs / "archive" / "file_mode.json").exists()
+
+
+def test_archive_compresses_before_encrypting(vault_dirs):
+    from secure_eo_pipeline.utils import security
+
+    _stage(["packed"])
+    expected = np.load(vault_dirs / "processing" / "packed.npy")
+    ArchiveManager().archive_product("packed")
+
+    record = catalog.get("packed")
+    assert record["compression"] == ("zstd-3" if security.HAVE_ZSTD else "none")
+    output = vault_dirs / "delivered.npy"
+    assert ArchiveManager().retrieve_product("packed", str(output)) is True
+    np.testing.assert_array_equal(np.load(output), expected)
+
+
+def test_archive_product_async_overlaps_and_matches(vault_dirs):
+    import asyncio
+
+    ids = ["async_1", "async_2"]
+    _stage(ids)
+    expected = {i: np.load(vault_dirs / "processing" / f"{i}.npy") for i in ids}
+    manager = ArchiveManager()
+
+    async def archive_all():
+        return await asyncio.gather(*(manager.archive_product_async(i) for i in ids))
+
+    assert all(asyncio.run(archive_all()))
+    assert manager.archive_product_overlapped("never_processed") is None
+    for i in ids:
+        assert catalog.get(i)["status"] == "ARCHIVED"
+        output = vault_dirs / f"{i}.out.npy"
+        assert manager.retrieve_product(i, str(output)) is True
+        np.testing.assert_array_equal(np.load(output), expected[i])
+
+
+def test_retrieve_encrypted_copies_ciphertext_verbatim(vault_dirs):
+    _stage(["mirror_1"])
+    ArchiveManager().archive_product("mirror_1")
+
+    mirror = vault_dirs / "mirror.enc"
+    assert ArchiveManager().retrieve_encrypted("mirror_1", str(mirror)) is True
+    assert mirror.read_bytes() == (vault_dirs / "archive" / "mirror_1.enc").read_bytes()
+    assert ArchiveManager().retrieve_encrypted("not_in_vault", str(vault_dirs / "x.enc")) is False
+
+
+def test_verify_product_detects_corruption(vault_dirs):
+    _stage(["verify_1"])
+    ArchiveManager().archive_product("verify_1")
+    manager = ArchiveManager()
+    assert manager.verify_product("verify_1") is True
+
+    archive = vault_dirs / "archive" / "verify_1.enc"
+    raw = bytearray(archive.read_bytes())
+    raw[len(raw) // 2] ^= 0x01
+    archive.write_bytes(bytes(raw))
+    assert manager.verify_product("verify_1") is False
+    assert manager.verify_product("not_in_vault") is False